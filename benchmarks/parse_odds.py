@@ -0,0 +1,102 @@
+"""Benchmark OddsScraper.parse_odds on large Odds API payloads.
+
+Usage:
+    python benchmarks/parse_odds.py [payload.json ...] [--games N] [--books N]
+
+Payloads are either the JSON body of a /sports/{sport}/odds/ response or
+an odds_replay recording of one, whose ``body`` holds the raw response
+text (older recordings hold the decoded list). Games from every file are
+parsed together; with no files a synthetic board is generated instead.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odds_scraper import OddsScraper
+
+
+def synthetic_payload(n_games=5000, n_books=40, seed=0):
+    """Build an Odds-API-shaped payload with every book quoting all markets"""
+    import random
+    rng = random.Random(seed)
+    games = []
+    for g in range(n_games):
+        home, away = f"Home Team {g % 400}", f"Away Team {g % 397}"
+        bookmakers = []
+        for b in range(n_books):
+            spread = rng.choice([-7.5, -3.5, -1.5, 1.5, 3.5, 7.5])
+            total = rng.choice([210.5, 215.5, 220.5, 225.5])
+            bookmakers.append({
+                'key': f"book_{b}",
+                'title': f"Book {b}",
+                'last_update': '2026-01-01T00:00:00Z',
+                'markets': [
+                    {'key': 'h2h', 'outcomes': [
+                        {'name': home, 'price': rng.randint(-250, -105)},
+                        {'name': away, 'price': rng.randint(100, 240)}]},
+                    {'key': 'spreads', 'outcomes': [
+                        {'name': home, 'price': -110, 'point': spread},
+                        {'name': away, 'price': -110, 'point': -spread}]},
+                    {'key': 'totals', 'outcomes': [
+                        {'name': 'Over', 'price': -110, 'point': total},
+                        {'name': 'Under', 'price': -110, 'point': total}]},
+                ]
+            })
+        games.append({
+            'id': f"game{g:06d}",
+            'sport_key': 'basketball_nba',
+            'commence_time': '2026-01-01T00:00:00Z',
+            'home_team': home,
+            'away_team': away,
+            'bookmakers': bookmakers
+        })
+    return games
+
+
+def bench(name, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {name:28s} {best * 1000:9.1f} ms  {len(df) / best:12,.0f} rows/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('payloads', nargs='*', help="recorded odds payload JSON files")
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--books', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.payloads:
+        raw = []
+        for path in args.payloads:
+            with open(path, 'rb') as f:
+                body = json.load(f)
+            # Recorder files wrap the body with request metadata
+            if isinstance(body, dict):
+                body = body['body']
+                if isinstance(body, (str, bytes)):
+                    body = json.loads(body)
+            raw.extend(body)
+    else:
+        raw = synthetic_payload(args.games, args.books)
+    encoded = json.dumps(raw).encode()
+
+    scraper = OddsScraper.__new__(OddsScraper)
+    n_prices = len(scraper.parse_odds(raw))
+    print(f"Payload: {len(raw)} games, {n_prices:,} prices, {len(encoded) / 1e6:.1f} MB")
+
+    bench("parse decoded list", lambda: scraper.parse_odds(raw), args.repeat)
+    bench("parse streamed bytes", lambda: scraper.parse_odds(io.BytesIO(encoded)), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Benchmark suite for every pipeline stage.
+
+Usage:
+    python benchmarks/run.py [--quick] [--filter NAME] [--repeat N] [--out results.json]
+    python benchmarks/run.py compare BASE.json NEW.json [--threshold 0.10]
+
+Each case runs at several sizes; setup happens outside the timed region.
+Results are written as JSON (one entry per case and size, with timings in
+seconds) so two runs can be compared. ``compare`` flags every case whose
+median time grew by more than the threshold and exits non-zero if any did.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CASES = []
+
+
+def case(name, sizes, quick):
+    """Register a benchmark; the function does setup and returns the timed callable"""
+    def register(fn):
+        CASES.append({'name': name, 'sizes': sizes, 'quick': quick, 'setup': fn})
+        return fn
+    return register
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the pipeline's progress prints while timing"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _history_csv(workdir, n_games):
+    """Generate (once per size) a historical CSV to feed model benchmarks"""
+    from data_generator import generate_historical_data
+
+    path = os.path.join(workdir, f"historical_{n_games}.csv")
+    if not os.path.exists(path):
+        with quiet():
+            generate_historical_data(n_games=n_games, output_path=path)
+    return path
+
+
+def _trained_model(workdir, n_games=10000):
+    from model_training import BettingModel
+
+    model = BettingModel()
+    with quiet():
+        X, y = model.load_data(_history_csv(workdir, n_games))
+        model.train(X, y)
+    return model, X
+
+
+@case('generate_historical_data', sizes=[10_000, 1_000_000], quick=[10_000])
+def bench_generate(size, workdir):
+    from data_generator import generate_historical_data
+
+    path = os.path.join(workdir, 'generated.csv')
+    return lambda: generate_historical_data(n_games=size, output_path=path)
+
+
+@case('BettingModel.load_data', sizes=[10_000, 1_000_000], quick=[10_000])
+def bench_load_data(size, workdir):
+    from model_training import BettingModel
+
+    path = _history_csv(workdir, size)
+    return lambda: BettingModel().load_data(path)
+
+
+@case('BettingModel.train', sizes=[10_000, 100_000], quick=[10_000])
+def bench_train(size, workdir):
+    from model_training import BettingModel
+
+    model = BettingModel()
+    with quiet():
+        X, y = model.load_data(_history_csv(workdir, size))
+    return lambda: model.train(X, y)
+
+
+@case('BettingModel.predict', sizes=[1], quick=[1])
+def bench_predict_single(size, workdir):
+    model, X = _trained_model(workdir)
+    row = X.iloc[:1]
+    return lambda: model.predict(row)
+
+
+@case('BettingModel.predict_batch', sizes=[1_000, 100_000], quick=[1_000])
+def bench_predict_batch(size, workdir):
+    import pandas as pd
+
+    model, X = _trained_model(workdir)
+    batch = pd.concat([X] * (size // len(X) + 1), ignore_index=True).iloc[:size]
+    return lambda: model.predict_batch(batch)
+
+
+@case('EdgeFinder odds math (scalar)', sizes=[10_000, 1_000_000], quick=[10_000])
+def bench_edge_math_scalar(size, workdir):
+    import numpy as np
+    from edge_finder import EdgeFinder
+
+    finder = EdgeFinder.__new__(EdgeFinder)
+    rng = np.random.default_rng(0)
+    odds = rng.choice([-250, -180, -140, -110, 105, 130, 175, 220], size).tolist()
+    probs = rng.uniform(0.3, 0.7, size).tolist()
+
+    def run():
+        for p, o in zip(probs, odds):
+            market = finder.american_to_prob(o)
+            finder.calculate_edge(p, market)
+            finder.expected_value(p, o)
+            finder.kelly_criterion(p, o)
+    return run
+
+
+@case('EdgeFinder odds math (vectorized)', sizes=[10_000, 1_000_000], quick=[10_000])
+def bench_edge_math_vector(size, workdir):
+    import numpy as np
+    from odds_math import american_to_prob, expected_value, kelly_fraction
+
+    rng = np.random.default_rng(0)
+    odds = rng.choice([-250, -180, -140, -110, 105, 130, 175, 220], size).astype(np.float64)
+    probs = rng.uniform(0.3, 0.7, size)
+
+    def run():
+        market = american_to_prob(odds)
+        (probs - market) * 100
+        expected_value(probs, odds)
+        kelly_fraction(probs, odds)
+    return run
+
+
+@case('OddsScraper.parse_odds', sizes=[500, 5_000], quick=[500])
+def bench_parse_odds(size, workdir):
+    from parse_odds import synthetic_payload
+    from odds_scraper import OddsScraper
+
+    raw = synthetic_payload(n_games=size, n_books=40)
+    scraper = OddsScraper.__new__(OddsScraper)
+    return lambda: scraper.parse_odds(raw)
+
+
+def _filled_store(workdir, n_games, n_polls):
+    """Odds store holding ``n_polls`` snapshots of an n_games x 40 book board"""
+    import numpy as np
+    from parse_odds import synthetic_payload
+    from odds_scraper import OddsScraper
+    from odds_store import OddsStore
+
+    path = os.path.join(workdir, f"odds_{n_games}_{n_polls}.db")
+    store = OddsStore(path)
+    scraper = OddsScraper.__new__(OddsScraper)
+    board = scraper.parse_odds(synthetic_payload(n_games=n_games, n_books=40))
+    # Games start after the last poll so as-of reads see the whole board
+    board['commence_time'] = '2026-01-02T00:00:00Z'
+
+    if not os.path.exists(path):
+        rng = np.random.default_rng(0)
+        start = datetime(2026, 1, 1)
+        for poll in range(n_polls):
+            # Roughly 5% of prices move between polls
+            moved = rng.random(len(board)) < 0.05
+            board.loc[moved, 'price'] += rng.choice([-5, 5], moved.sum())
+            store.save_snapshot(board, fetch_timestamp=start.replace(minute=poll % 60, hour=poll // 60))
+    return store, board
+
+
+@case('OddsScraper.save_to_db', sizes=[500, 5_000], quick=[500])
+def bench_save_to_db(size, workdir):
+    import numpy as np
+    import pandas as pd
+    from odds_scraper import OddsScraper
+
+    store, board = _filled_store(workdir, size, n_polls=20)
+    scraper = OddsScraper.__new__(OddsScraper)
+    scraper.store = store
+    rng = np.random.default_rng(1)
+    state = {'poll': 0}
+
+    def run():
+        state['poll'] += 1
+        moved = rng.random(len(board)) < 0.05
+        board.loc[moved, 'price'] += 5
+        board['fetch_timestamp'] = pd.Timestamp(2026, 1, 2) + pd.Timedelta(minutes=state['poll'])
+        scraper.save_to_db(board)
+    return run
+
+
+@case('OddsStore.get_snapshot (latest)', sizes=[500, 5_000], quick=[500])
+def bench_get_latest(size, workdir):
+    store, _ = _filled_store(workdir, size, n_polls=20)
+    return lambda: store.get_snapshot()
+
+
+@case('OddsStore.get_snapshot (as-of)', sizes=[500, 5_000], quick=[500])
+def bench_get_as_of(size, workdir):
+    store, _ = _filled_store(workdir, size, n_polls=20)
+    return lambda: store.get_snapshot(as_of=datetime(2026, 1, 1, 0, 10))
+
+
+@case('OddsScraper.get_latest_odds (wide)', sizes=[500, 5_000], quick=[500])
+def bench_get_latest_wide(size, workdir):
+    # Same read as get_latest_odds, minus its check for the configured DB path
+    store, _ = _filled_store(workdir, size, n_polls=20)
+    return lambda: store.get_snapshot(wide=True)
+
+
+@case('OddsTickGenerator.ticks (20 polls)', sizes=[1_000, 5_000], quick=[1_000])
+def bench_generate_ticks(size, workdir):
+    from odds_generator import OddsTickGenerator
+
+    gen = OddsTickGenerator(n_games=size, n_books=40, n_polls=20)
+    return lambda: sum(len(ticks) for ticks in gen.ticks())
+
+
+@case('OddsStore.save_snapshot (generated poll)', sizes=[500, 5_000], quick=[500])
+def bench_save_generated(size, workdir):
+    from odds_generator import OddsTickGenerator
+    from odds_store import OddsStore
+
+    # Fresh store per size; the opening board is written during setup so
+    # each timed call stores one poll of realistic changes
+    store = OddsStore(os.path.join(workdir, f"generated_{size}.db"))
+    boards = OddsTickGenerator(n_games=size, n_books=40, n_polls=1000).boards()
+    store.save_snapshot(next(boards))
+    return lambda: store.save_snapshot(next(boards))
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        with quiet():
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def run(args):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for bench in CASES:
+            if args.filter and args.filter.lower() not in bench['name'].lower():
+                continue
+            for size in (bench['quick'] if args.quick else bench['sizes']):
+                with quiet():
+                    fn = bench['setup'](size, workdir)
+                timings = measure(fn, args.repeat)
+                result = {
+                    'name': bench['name'],
+                    'size': size,
+                    'rounds': len(timings),
+                    'min': min(timings),
+                    'median': statistics.median(timings),
+                    'mean': statistics.mean(timings)
+                }
+                results.append(result)
+                print(f"  {bench['name']:36s} size={size:>10,}  median={result['median'] * 1000:10.2f} ms")
+
+    report = {'environment': environment(), 'results': results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to: {args.out}")
+    return 0
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = {(r['name'], r['size']): r for r in json.load(f)['results']}
+    with open(args.new) as f:
+        new = {(r['name'], r['size']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        ratio = new[key]['median'] / base[key]['median'] if base[key]['median'] else float('inf')
+        flag = ''
+        if ratio > 1 + args.threshold:
+            flag = '  ✗ REGRESSION'
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = '  ✓ faster'
+        print(f"  {key[0]:36s} size={key[1]:>10,}  "
+              f"{base[key]['median'] * 1000:10.2f} -> {new[key]['median'] * 1000:10.2f} ms  "
+              f"({ratio:5.2f}x){flag}")
+
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"  {key[0]:36s} size={key[1]:>10,}  only in {'base' if key in base else 'new'}")
+
+    print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        parser = argparse.ArgumentParser(prog='run.py compare', description="Compare two benchmark runs")
+        parser.add_argument('base')
+        parser.add_argument('new')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help="relative slowdown of the median that counts as a regression")
+        return compare(parser.parse_args(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="smallest size of each case only")
+    parser.add_argument('--filter', default=None, help="run cases whose name contains this")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default=os.path.join(ROOT, 'benchmarks', 'results',
+                                                      f"{datetime.now():%Y%m%d-%H%M%S}.json"))
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
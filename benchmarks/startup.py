@@ -0,0 +1,71 @@
+"""Startup-time regression check for cli.py.
+
+Usage:
+    python benchmarks/startup.py [--budget-ms 150] [--runs 7]
+
+Fails (exit status 1) if dispatching a CLI subcommand imports any heavy
+dependency before the subcommand runs, or if ``cli.py --help`` takes
+longer than the budget (median wall time over several runs).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'xgboost', 'sklearn', 'sqlite3', 'requests',
+                 'joblib', 'streamlit', 'plotly', 'pyarrow']
+
+# Parse every subcommand (without running it), then report which
+# heavy modules were imported along the way
+PROBE = """
+import sys
+sys.path.insert(0, {root!r})
+import cli
+parser = cli.build_parser()
+for command in ('scrape', 'generate', 'train', 'find', 'run', 'serve'):
+    parser.parse_args([command])
+heavy = {heavy!r}
+print(','.join(m for m in heavy if m in sys.modules))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    failed = False
+
+    probe = PROBE.format(root=ROOT, heavy=HEAVY_MODULES)
+    leaked = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+    leaked = leaked.stdout.strip()
+    if leaked:
+        print(f"✗ Heavy modules imported at CLI startup: {leaked}")
+        failed = True
+    else:
+        print("✓ No heavy modules imported at CLI startup")
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, 'cli.py'), '--help'],
+                       stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    median = statistics.median(timings)
+    if median > args.budget_ms:
+        print(f"✗ cli.py --help took {median:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        failed = True
+    else:
+        print(f"✓ cli.py --help took {median:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime, timezone
+import sqlite3
+import os
+import sys
+from settings import config
+from odds_math import american_to_decimal, american_to_prob
+from odds_store import format_timestamp
+
+BETS_DB_PATH = config.BETS_DB_PATH
+BANKROLL = config.BANKROLL
+
+# One open position per side of a market at a book
+BET_KEY = ['game_id', 'market', 'selection', 'book']
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bets (
+        bet_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        placed_at TEXT NOT NULL,
+        game_id TEXT NOT NULL,
+        sport TEXT,
+        commence_time TEXT,
+        home_team TEXT,
+        away_team TEXT,
+        market TEXT NOT NULL,
+        selection TEXT NOT NULL,
+        line REAL,
+        odds REAL NOT NULL,
+        book TEXT,
+        stake REAL NOT NULL,
+        our_prob REAL,
+        edge REAL,
+        model_version TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        profit REAL,
+        settled_at TEXT,
+        close_odds REAL,
+        clv_price REAL,
+        clv_consensus REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_bets_status_game ON bets (status, game_id);
+    CREATE INDEX IF NOT EXISTS idx_bets_key ON bets (game_id, market, selection, book);
+
+    -- Running totals per market, updated in the same transaction as bets
+    CREATE TABLE IF NOT EXISTS ledger_totals (
+        market TEXT PRIMARY KEY,
+        bets INTEGER NOT NULL DEFAULT 0,
+        pending INTEGER NOT NULL DEFAULT 0,
+        won INTEGER NOT NULL DEFAULT 0,
+        lost INTEGER NOT NULL DEFAULT 0,
+        push INTEGER NOT NULL DEFAULT 0,
+        staked REAL NOT NULL DEFAULT 0,
+        settled_stake REAL NOT NULL DEFAULT 0,
+        profit REAL NOT NULL DEFAULT 0,
+        implied_sum REAL NOT NULL DEFAULT 0
+    );
+
+    -- Settled results per day and market, the source for performance charts
+    CREATE TABLE IF NOT EXISTS ledger_daily (
+        day TEXT NOT NULL,
+        market TEXT NOT NULL,
+        bets INTEGER NOT NULL DEFAULT 0,
+        won INTEGER NOT NULL DEFAULT 0,
+        lost INTEGER NOT NULL DEFAULT 0,
+        push INTEGER NOT NULL DEFAULT 0,
+        stake REAL NOT NULL DEFAULT 0,
+        profit REAL NOT NULL DEFAULT 0,
+        implied_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, market)
+    );
+"""
+
+
+class BetLedger:
+    """Record of every bet placed from EdgeFinder recommendations.
+
+    Bets are graded in batches by ``settle``. ``ledger_totals`` and
+    ``ledger_daily`` are maintained incrementally on every write, so
+    reporting reads a handful of rows regardless of ledger size.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or BETS_DB_PATH
+
+    def connect(self):
+        """Open the ledger and make sure the schema exists"""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def record(self, opportunities, model_version=None, bankroll=None, placed_at=None):
+        """Store new recommendations as pending bets.
+
+        Rows need game_id, odds and either stake or kelly_size (% of
+        bankroll). market/selection default to a home moneyline and
+        ``bookmaker`` is accepted for book. Rows without a game_id (demo
+        opportunities) and sides already held at a book are skipped.
+        Returns the number of bets recorded.
+        """
+        if opportunities.empty or 'game_id' not in opportunities:
+            return 0
+
+        bankroll = bankroll or BANKROLL
+        bets = opportunities[opportunities['game_id'].notna()].copy()
+        if 'book' not in bets:
+            bets['book'] = bets.get('bookmaker')
+        for column, default in (('market', 'h2h'), ('selection', 'home'), ('line', np.nan),
+                                ('sport', None), ('commence_time', None), ('home_team', None),
+                                ('away_team', None), ('our_prob', np.nan), ('edge', np.nan)):
+            if column not in bets:
+                bets[column] = default
+        if 'stake' not in bets:
+            bets['stake'] = (bankroll * bets['kelly_size'] / 100).round(2)
+        bets = bets[bets['stake'] > 0].drop_duplicates(BET_KEY)
+        if bets.empty:
+            return 0
+
+        # UTC, in the odds store's format, like every other timestamp
+        bets['placed_at'] = format_timestamp(placed_at or datetime.now(timezone.utc))
+        # A model_version column (one per scoring model) wins over the argument
+        if 'model_version' in bets:
+            bets['model_version'] = bets['model_version'].where(bets['model_version'].notna(), model_version)
+        else:
+            bets['model_version'] = model_version
+
+        conn = self.connect()
+        try:
+            held = self._existing_keys(conn, bets['game_id'].unique())
+            if not held.empty:
+                bets = bets.merge(held, on=BET_KEY, how='left', indicator=True)
+                bets = bets[bets['_merge'] == 'left_only'].drop(columns='_merge')
+            if bets.empty:
+                return 0
+
+            columns = ['placed_at', 'game_id', 'sport', 'commence_time', 'home_team', 'away_team',
+                       'market', 'selection', 'line', 'odds', 'book', 'stake', 'our_prob',
+                       'edge', 'model_version']
+            conn.executemany(
+                f"INSERT INTO bets ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                _rows(bets[columns])
+            )
+
+            added = bets.groupby('market').agg(n=('stake', 'size'), staked=('stake', 'sum')).reset_index()
+            conn.executemany("""
+                INSERT INTO ledger_totals (market, bets, pending, staked) VALUES (?, ?, ?, ?)
+                ON CONFLICT (market) DO UPDATE SET
+                    bets = bets + excluded.bets,
+                    pending = pending + excluded.pending,
+                    staked = staked + excluded.staked
+            """, ((m, int(n), int(n), float(s)) for m, n, s in added.itertuples(index=False)))
+            conn.commit()
+        finally:
+            conn.close()
+
+        return len(bets)
+
+    def _existing_keys(self, conn, game_ids):
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_games (game_id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM lookup_games")
+        conn.executemany("INSERT OR IGNORE INTO lookup_games VALUES (?)", ((g,) for g in game_ids))
+        return pd.read_sql_query(f"""
+            SELECT {', '.join(BET_KEY)} FROM bets
+            WHERE game_id IN (SELECT game_id FROM lookup_games)
+        """, conn)
+
+    def pending(self, game_ids=None):
+        """Pending bets, optionally for specific games"""
+        conn = self.connect()
+        try:
+            if game_ids is None:
+                return pd.read_sql_query("SELECT * FROM bets WHERE status = 'pending'", conn)
+            self._existing_keys(conn, game_ids)
+            return pd.read_sql_query("""
+                SELECT * FROM bets
+                WHERE status = 'pending' AND game_id IN (SELECT game_id FROM lookup_games)
+            """, conn)
+        finally:
+            conn.close()
+
+    def settle(self, scores, settled_at=None, archive=None):
+        """Grade pending bets against final scores in one vectorized pass.
+
+        ``scores`` has game_id, home_score and away_score. Moneyline,
+        spread (selection's score plus line) and total bets are graded
+        won/lost/push together; bets and running totals are updated in a
+        single transaction, skipping bets another run settled meanwhile. Closing-line value is then filled in from the
+        odds history (``archive``). Returns the graded bets.
+        """
+        if scores.empty:
+            return pd.DataFrame()
+
+        settled_at = format_timestamp(settled_at or datetime.now(timezone.utc))
+        bets = self.pending(scores['game_id'].unique())
+        if bets.empty:
+            return bets
+
+        bets = bets.merge(scores[['game_id', 'home_score', 'away_score']], on='game_id')
+        graded = grade_bets(bets)
+        graded['settled_at'] = settled_at
+        graded['day'] = settled_at[:10]
+
+        conn = self.connect()
+        try:
+            # Only bets still pending are graded, so a bet an overlapping
+            # settle run has already counted is left out of the totals
+            settled = [
+                conn.execute("""
+                    UPDATE bets SET status = ?, profit = ?, settled_at = ?
+                    WHERE bet_id = ? AND status = 'pending'
+                """, row).rowcount == 1
+                for row in _rows(graded[['status', 'profit', 'settled_at', 'bet_id']])
+            ]
+            graded = graded[settled].copy()
+
+            graded['won'] = (graded['status'] == 'won').astype(int)
+            graded['lost'] = (graded['status'] == 'lost').astype(int)
+            graded['push'] = (graded['status'] == 'push').astype(int)
+            # Only won/lost bets count towards the market's implied hit rate
+            graded['implied'] = np.where(graded['status'].isin(['won', 'lost']),
+                                         american_to_prob(graded['odds'].to_numpy()), 0.0)
+
+            by_market = graded.groupby('market').agg(
+                n=('bet_id', 'size'), won=('won', 'sum'), lost=('lost', 'sum'), push=('push', 'sum'),
+                stake=('stake', 'sum'), profit=('profit', 'sum'), implied=('implied', 'sum')
+            ).reset_index()
+            conn.executemany("""
+                UPDATE ledger_totals SET
+                    pending = pending - ?, won = won + ?, lost = lost + ?, push = push + ?,
+                    settled_stake = settled_stake + ?, profit = profit + ?, implied_sum = implied_sum + ?
+                WHERE market = ?
+            """, ((int(r.n), int(r.won), int(r.lost), int(r.push), float(r.stake), float(r.profit),
+                   float(r.implied), r.market) for r in by_market.itertuples(index=False)))
+
+            by_day = graded.groupby(['day', 'market']).agg(
+                n=('bet_id', 'size'), won=('won', 'sum'), lost=('lost', 'sum'), push=('push', 'sum'),
+                stake=('stake', 'sum'), profit=('profit', 'sum'), implied=('implied', 'sum')
+            ).reset_index()
+            conn.executemany("""
+                INSERT INTO ledger_daily (day, market, bets, won, lost, push, stake, profit, implied_sum)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (day, market) DO UPDATE SET
+                    bets = bets + excluded.bets, won = won + excluded.won, lost = lost + excluded.lost,
+                    push = push + excluded.push, stake = stake + excluded.stake,
+                    profit = profit + excluded.profit, implied_sum = implied_sum + excluded.implied_sum
+            """, ((r.day, r.market, int(r.n), int(r.won), int(r.lost), int(r.push), float(r.stake),
+                   float(r.profit), float(r.implied)) for r in by_day.itertuples(index=False)))
+            conn.commit()
+        finally:
+            conn.close()
+
+        print(f"✓ Settled {len(graded)} bets: {int(graded['won'].sum())} won, "
+              f"{int(graded['lost'].sum())} lost, {int(graded['push'].sum())} push")
+        print(f"✓ Closing-line value for {self.update_clv(archive)} bets")
+        return graded
+
+    def update_clv(self, archive=None):
+        """Store closing-line value for settled bets that lack it"""
+        from clv import clv_for_recommendations
+
+        conn = self.connect()
+        try:
+            bets = pd.read_sql_query("""
+                SELECT bet_id, game_id, sport, commence_time, market, selection AS outcome, line, book, odds
+                FROM bets
+                WHERE status != 'pending' AND close_odds IS NULL AND commence_time IS NOT NULL
+            """, conn)
+            if bets.empty:
+                return 0
+
+            clv = clv_for_recommendations(bets, archive=archive)
+            clv = clv[clv['close_odds'].notna()]
+            conn.executemany(
+                "UPDATE bets SET close_odds = ?, clv_price = ?, clv_consensus = ? WHERE bet_id = ?",
+                _rows(clv[['close_odds', 'clv_price', 'clv_consensus', 'bet_id']])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(clv)
+
+    def totals(self):
+        """Running totals per market"""
+        conn = self.connect()
+        try:
+            return pd.read_sql_query("SELECT * FROM ledger_totals ORDER BY market", conn)
+        finally:
+            conn.close()
+
+
+def grade_bets(bets):
+    """Vectorized won/lost/push grading and profit for bets joined to scores"""
+    home = bets['home_score'].to_numpy(dtype=np.float64)
+    away = bets['away_score'].to_numpy(dtype=np.float64)
+    line = bets['line'].fillna(0).to_numpy(dtype=np.float64)
+    market = bets['market'].to_numpy()
+    selection = bets['selection'].to_numpy()
+
+    team_margin = np.where(selection == 'home', home - away, away - home)
+    total_margin = np.where(selection == 'over', home + away - line, line - (home + away))
+    margin = np.select(
+        [market == 'h2h', market == 'spreads', market == 'totals'],
+        [team_margin, team_margin + line, total_margin],
+        default=np.nan
+    )
+
+    graded = bets.copy()
+    graded['status'] = np.select([margin > 0, margin < 0, margin == 0], ['won', 'lost', 'push'],
+                                 default='void')
+    decimal = american_to_decimal(graded['odds'].to_numpy(dtype=np.float64))
+    stake = graded['stake'].to_numpy(dtype=np.float64)
+    graded['profit'] = np.select(
+        [graded['status'] == 'won', graded['status'] == 'lost'],
+        [stake * (decimal - 1), -stake],
+        default=0.0
+    ).round(2)
+    return graded
+
+
+def _rows(df):
+    """Tuples for executemany with NaN mapped to NULL"""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def main():
+    """Settle pending bets from a CSV of final scores"""
+    if len(sys.argv) < 2:
+        print("Usage: python bet_ledger.py <scores.csv>  (game_id, home_score, away_score)")
+        return
+
+    ledger = BetLedger()
+    ledger.settle(pd.read_csv(sys.argv[1]))
+
+    print("\nLEDGER TOTALS")
+    for _, row in ledger.totals().iterrows():
+        roi = row['profit'] / row['settled_stake'] * 100 if row['settled_stake'] else 0
+        print(f"  {row['market']:8s} bets={row['bets']:6d} pending={row['pending']:5d} "
+              f"W-L-P={row['won']}-{row['lost']}-{row['push']} profit=${row['profit']:,.2f} ROI={roi:.1f}%")
+
+    import performance
+    conn = performance.connect(ledger.db_path)
+    try:
+        clv = performance.clv_summary(conn)
+    finally:
+        conn.close()
+    if not clv.empty:
+        print("\nCLOSING LINE VALUE")
+        for _, row in clv.iterrows():
+            print(f"  {row['market']:11s} bets={int(row['bets']):6d} beat close={row['beat_close_pct']:5.1f}% "
+                  f"avg CLV={row['avg_clv_price']:+.2f}% vs consensus={row['avg_clv_consensus']:+.2f}%")
+
+if __name__ == "__main__":
+    main()
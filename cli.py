@@ -0,0 +1,152 @@
+"""Command line entry point for the betting pipeline.
+
+    python cli.py scrape [--sport basketball_nba ...]
+    python cli.py generate
+    python cli.py train [--sport americanfootball_nfl --data nfl_history.csv]
+    python cli.py train --chunks data/history_chunks [--chunk-rows 1000000]
+    python cli.py find [--record]
+    python cli.py run [--sport ...] [--poll-seconds 30] [--workers parse=2 ...]
+    python cli.py serve [--port 8501]
+
+Global options (before the subcommand):
+    --metrics PATH        record stage timings and counters, write them on
+                          exit (.json for JSON, otherwise Prometheus text)
+    --metrics-port PORT   also serve /metrics and /metrics.json while running
+    --profile             write a cProfile dump of the run
+    --profile-out PATH    where to write it (implies --profile; default
+                          profiles/<command>-<time>.prof)
+
+Heavy dependencies (pandas, numpy, xgboost, sklearn, sqlite3, requests)
+are imported inside the subcommand that needs them, so parsing arguments
+and dispatching costs only the standard library. Keep it that way:
+benchmarks/startup.py fails if a top-level import creeps in here.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import orchestrator
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def cmd_scrape(args):
+    """Fetch, parse and store odds for each sport"""
+    from odds_scraper import OddsScraper
+
+    scraper = OddsScraper(base_url=args.base_url)
+    for sport in args.sport:
+        odds_data = scraper.get_odds(sport)
+        if not odds_data:
+            print(f"✗ No {sport} games found or API error")
+            continue
+        scraper.save_to_db(scraper.parse_odds(odds_data))
+
+
+def cmd_generate(args):
+    """Generate synthetic historical training data"""
+    from data_generator import generate_historical_data
+
+    generate_historical_data()
+
+
+def cmd_train(args):
+    """Train and save the model"""
+    import model_training
+
+    model_training.main(sport=args.sport, data_path=args.data,
+                        chunk_dir=args.chunks, chunk_rows=args.chunk_rows)
+
+
+def cmd_find(args):
+    """Score the latest odds, optionally recording new edges as bets"""
+    import edge_finder
+
+    edge_finder.main(record=args.record)
+
+
+def cmd_run(args):
+    """Run the streaming fetch-to-alert pipeline until stopped"""
+    return orchestrator.run(args)
+
+
+def cmd_serve(args):
+    """Run the Streamlit dashboard"""
+    import subprocess
+
+    command = [sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, 'dashboard.py'),
+               '--server.port', str(args.port)]
+    return subprocess.call(command)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Sports betting edge pipeline")
+    parser.add_argument('--metrics', metavar='PATH', default=None,
+                        help="write metrics here on exit (.json or Prometheus text)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve /metrics and /metrics.json on this port")
+    parser.add_argument('--profile', action='store_true', help="write a cProfile dump of the run")
+    parser.add_argument('--profile-out', metavar='PATH', default=None,
+                        help="cProfile dump path (default profiles/<command>-<time>.prof)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('scrape', help="fetch and store current odds")
+    p.add_argument('--sport', nargs='+', default=['basketball_nba'])
+    p.add_argument('--base-url', default=None, help="Odds API base URL, e.g. a replay server")
+    p.set_defaults(func=cmd_scrape)
+
+    p = sub.add_parser('generate', help="generate synthetic training data")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser('train', help="train the betting model")
+    p.add_argument('--sport', default=None, help="save as this sport's model instead of the default")
+    p.add_argument('--data', default=None, help="historical games CSV (default from config)")
+    p.add_argument('--chunks', default=None, metavar='DIR',
+                   help="train out of core from Parquet chunks in DIR (split from --data if empty)")
+    p.add_argument('--chunk-rows', type=int, default=None, help="rows per chunk when splitting")
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser('find', help="find betting edges in the latest odds")
+    p.add_argument('--record', action='store_true', help="record the opportunities as bets in the ledger")
+    p.set_defaults(func=cmd_find)
+
+    p = sub.add_parser('run', help="poll, store, score and alert continuously")
+    orchestrator.add_arguments(p)
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('serve', help="run the dashboard")
+    p.add_argument('--port', type=int, default=8501)
+    p.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Load config once, before any subcommand module asks for it
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import settings  # noqa: F401
+    import metrics
+
+    if args.metrics or args.metrics_port:
+        metrics.enable()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    with contextlib.ExitStack() as stack:
+        if args.profile or args.profile_out:
+            path = args.profile_out
+            if path is None:
+                path = os.path.join('profiles', f"{args.command}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            stack.enter_context(metrics.profile(path))
+            stack.callback(print, f"✓ Profile saved to: {path}")
+        if args.metrics:
+            stack.callback(lambda: print(f"✓ Metrics saved to: {metrics.write(args.metrics)}"))
+        return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
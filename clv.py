@@ -0,0 +1,183 @@
+import pandas as pd
+import numpy as np
+import sys
+from odds_archive import OddsArchive
+from odds_math import american_to_prob, american_to_decimal
+
+KEY_COLUMNS = ['game_id', 'book', 'market', 'outcome']
+HISTORY_COLUMNS = ['game_id', 'commence_time', 'book', 'market', 'outcome',
+                   'price', 'point', 'fetch_timestamp']
+
+
+def _line_key(market, point):
+    """Join key for the number a quote is at: its point, or 0 for moneylines.
+
+    Spread and total prices are only comparable at the same line.
+    """
+    point = np.round(pd.to_numeric(point, errors='coerce').to_numpy(dtype=np.float64), 1)
+    return np.where(np.asarray(market, dtype=object) == 'h2h', 0.0, point)
+
+
+def _commence(values):
+    """Parse commence times to naive UTC timestamps, the zone fetch times are stored in"""
+    return pd.to_datetime(values, utc=True).dt.tz_localize(None).astype('datetime64[ns]')
+
+
+def closing_lines(history):
+    """Last quoted price per (game, book, market, outcome) before kickoff.
+
+    Tombstones (NULL price) are ignored so a line pulled moments before
+    the start still closes at its final quote.
+    """
+    history = history[history['price'].notna()]
+    history = history[history['fetch_timestamp'] < _commence(history['commence_time'])]
+    history = history.sort_values(KEY_COLUMNS + ['fetch_timestamp'])
+    return history.groupby(KEY_COLUMNS, sort=False, observed=True).tail(1)
+
+
+def consensus_close(closes):
+    """No-vig closing probability per (game, market, outcome, line) across books.
+
+    Books closing a spread or total at a different number are averaged
+    separately; ``line_key`` is the point (0 for moneylines).
+    """
+    closes = closes.copy()
+    closes['implied'] = american_to_prob(closes['price'].to_numpy())
+    overround = closes.groupby(['game_id', 'book', 'market'], observed=True)['implied'].transform('sum')
+    closes['fair'] = closes['implied'] / overround
+    closes['line_key'] = _line_key(closes['market'], closes['point'])
+
+    return closes.groupby(['game_id', 'market', 'outcome', 'line_key'], observed=True).agg(
+        consensus_prob=('fair', 'mean'),
+        consensus_books=('fair', 'size')
+    ).reset_index()
+
+
+def compute_clv(recommendations, history):
+    """Attach closing-line value to each recommended bet.
+
+    ``recommendations`` needs game_id, book, market, outcome, odds and
+    commence_time, plus ``point`` (or ``line``) for spreads and totals.
+    The same-book close comes from an as-of join on commence_time against
+    the sorted history; consensus comes from the last pre-kickoff quote at
+    every book. Both only count quotes at the bet's line: a book that
+    closed at a different number has no close_odds.
+
+    Adds:
+        close_odds     -- same-book closing price at the bet's line
+        close_point    -- the book's closing line
+        clv_price      -- % gain of our decimal price over the close
+        consensus_prob -- de-vigged market probability at the close
+        clv_consensus  -- EV of our price at the consensus close, %
+    """
+    recs = recommendations.copy()
+    recs['commence_ts'] = _commence(recs['commence_time'])
+    if 'point' not in recs:
+        recs['point'] = recs['line'] if 'line' in recs else np.nan
+
+    right = history[history['price'].notna()][KEY_COLUMNS + ['price', 'point', 'fetch_timestamp']]
+    right = right.rename(columns={'point': 'close_point'})
+    right['fetch_timestamp'] = right['fetch_timestamp'].astype('datetime64[ns]')
+    right = right.sort_values('fetch_timestamp')
+    for column in KEY_COLUMNS:
+        right[column] = right[column].astype(str)
+        recs[column] = recs[column].astype(str)
+
+    recs['_row'] = np.arange(len(recs))
+    recs = pd.merge_asof(
+        recs.sort_values('commence_ts'), right,
+        left_on='commence_ts', right_on='fetch_timestamp',
+        by=KEY_COLUMNS, allow_exact_matches=False, direction='backward'
+    ).rename(columns={'price': 'close_odds', 'fetch_timestamp': 'close_timestamp'})
+    recs['line_key'] = _line_key(recs['market'], recs['point'])
+    recs['close_odds'] = recs['close_odds'].where(
+        recs['line_key'] == _line_key(recs['market'], recs['close_point']))
+
+    consensus = consensus_close(closing_lines(history))
+    for column in ('game_id', 'market', 'outcome'):
+        consensus[column] = consensus[column].astype(str)
+    recs = recs.merge(consensus, on=['game_id', 'market', 'outcome', 'line_key'], how='left')
+
+    bet_decimal = american_to_decimal(recs['odds'].to_numpy())
+    close_decimal = american_to_decimal(recs['close_odds'].fillna(100).to_numpy())
+    recs['clv_price'] = np.where(recs['close_odds'].notna(), (bet_decimal / close_decimal - 1) * 100, np.nan)
+    recs['clv_consensus'] = (bet_decimal * recs['consensus_prob'] - 1) * 100
+    return recs.sort_values('_row').drop(columns=['commence_ts', '_row', 'line_key']).reset_index(drop=True)
+
+
+def clv_for_recommendations(recommendations, archive=None, window_days=7):
+    """Compute CLV for a season of bets, reading history a window at a time.
+
+    History is pulled per ``window_days`` slice of commence dates and
+    restricted to the recommended games, so only the relevant partitions
+    are scanned.
+    """
+    archive = archive or OddsArchive()
+    recs = recommendations.copy()
+    if 'book' not in recs and 'bookmaker' in recs:
+        recs['book'] = recs['bookmaker']
+
+    dates = _commence(recs['commence_time']).dt.floor('D')
+    window = (dates - dates.min()).dt.days // window_days
+
+    results = []
+    for _, chunk in recs.groupby(window, sort=True):
+        chunk_dates = _commence(chunk['commence_time'])
+        history = archive.read_history(
+            start=chunk_dates.min(), end=chunk_dates.max(),
+            sports=list(chunk['sport'].unique()) if 'sport' in chunk else None,
+            columns=HISTORY_COLUMNS,
+            game_ids=chunk['game_id'].unique()
+        )
+        results.append(compute_clv(chunk, history))
+
+    if not results:
+        return recs
+    return pd.concat(results, ignore_index=True)
+
+
+def summarize_clv(clv_df, by='market'):
+    """Share of bets beating the close and mean CLV, overall and per group"""
+    if clv_df.empty:
+        return pd.DataFrame()
+
+    df = clv_df.assign(
+        beat_close=clv_df['clv_price'] > 0,
+        beat_consensus=clv_df['clv_consensus'] > 0
+    )
+    summary = df.groupby(by).agg(
+        bets=('game_id', 'size'),
+        beat_close_pct=('beat_close', 'mean'),
+        avg_clv_price=('clv_price', 'mean'),
+        beat_consensus_pct=('beat_consensus', 'mean'),
+        avg_clv_consensus=('clv_consensus', 'mean')
+    )
+    summary.loc['All'] = [
+        len(df), df['beat_close'].mean(), df['clv_price'].mean(),
+        df['beat_consensus'].mean(), df['clv_consensus'].mean()
+    ]
+    summary['beat_close_pct'] *= 100
+    summary['beat_consensus_pct'] *= 100
+    return summary.reset_index()
+
+
+def main():
+    """Report CLV for a file of recommendations"""
+    if len(sys.argv) < 2:
+        print("Usage: python clv.py <recommendations.csv|.parquet>")
+        return
+
+    path = sys.argv[1]
+    recs = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+    print("CLOSING LINE VALUE")
+    print(f"\nScoring {len(recs)} recommendations against odds history...")
+    summary = summarize_clv(clv_for_recommendations(recs))
+
+    for _, row in summary.iterrows():
+        print(f"  {row.iloc[0]:10s} bets={int(row['bets']):6d}  "
+              f"beat close={row['beat_close_pct']:5.1f}%  avg CLV={row['avg_clv_price']:+.2f}%  "
+              f"vs consensus={row['avg_clv_consensus']:+.2f}%")
+
+if __name__ == "__main__":
+    main()
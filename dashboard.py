@@ -4,8 +4,26 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
+import sqlite3
+import os
 ODDS_API_KEY = st.secrets["ODDS_API_KEY"]
 
+from edge_finder import EdgeFinder
+from model_store import MODEL_DIR
+import performance
+import metrics
+from settings import config
+
+# Sidebar sport -> Odds API sport key; each key serves its own models
+SPORT_KEYS = {
+    'NBA': 'basketball_nba',
+    'NFL': 'americanfootball_nfl',
+    'MLB': 'baseball_mlb',
+    'NHL': 'icehockey_nhl'
+}
+DATA_TTL = 300  # seconds; data_version() catches fresher odds or models sooner
+REFRESH_SECONDS = 5  # how often the opportunities panel checks for new odds
+
 # Page config
 st.set_page_config(
     page_title="Sports Betting Edge Finder",
@@ -41,9 +59,81 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Mock data functions
-def get_opportunities():
-    """Get current betting opportunities"""
+# Process-wide resources shared by every session and rerun
+@st.cache_resource
+def get_edge_finder():
+    """Load the model once per process"""
+    return EdgeFinder()
+
+@st.cache_resource
+def _open_db_connection(db_path):
+    return sqlite3.connect(db_path, check_same_thread=False)
+
+def get_db_connection():
+    """Shared read connection to the odds store, once it exists"""
+    if not os.path.exists(config.ODDS_DB_PATH):
+        return None
+    return _open_db_connection(config.ODDS_DB_PATH)
+
+def data_version():
+    """Freshness key: latest odds snapshot and model file version"""
+    fetched = None
+    conn = get_db_connection()
+    if conn is not None:
+        try:
+            fetched = conn.execute("SELECT MAX(fetch_timestamp) FROM snapshots").fetchone()[0]
+        except sqlite3.Error:
+            pass
+    model_mtime = max((entry.stat().st_mtime for entry in _model_files(MODEL_DIR)), default=None)
+    ledger_mtime = os.path.getmtime(performance.BETS_DB_PATH) if os.path.exists(performance.BETS_DB_PATH) else None
+    return (fetched, model_mtime, ledger_mtime)
+
+def _model_files(directory):
+    """Every model pickle under the models directory, per-sport ones included"""
+    if not os.path.isdir(directory):
+        return
+    for entry in os.scandir(directory):
+        if entry.is_dir():
+            yield from _model_files(entry.path)
+        elif entry.name.endswith('.pkl'):
+            yield entry
+
+def query_ledger(query_fn, **kwargs):
+    """Run an aggregation against the bet ledger, or None without one"""
+    conn = performance.connect()
+    if conn is None:
+        return None
+    try:
+        df = query_fn(conn, **kwargs)
+    finally:
+        conn.close()
+    return None if df.empty else df
+
+# Data loaders are cached on the freshness key, so a widget change reuses
+# them and a new scrape or retrained model invalidates them
+@st.cache_data(ttl=DATA_TTL)
+def get_opportunities(version=None, sport=None):
+    """Get current betting opportunities for one sport key (None for all)"""
+    finder = get_edge_finder()
+    if finder.has_models():
+        # Every side with a positive edge; the sidebar slider does the filtering
+        opps = finder.find_opportunities(sport=sport, min_edge=0.0)
+        # Stored odds without an edge show no cards, not demo ones
+        if opps.empty:
+            return get_mock_opportunities().iloc[0:0]
+        return opps.rename(columns={
+            'recommended_bet': 'bet',
+            'bookmaker': 'book',
+            'kelly_size': 'kelly',
+            'expected_value': 'ev'
+        })
+    # Demo rows are NBA games
+    if sport not in (None, 'basketball_nba'):
+        return get_mock_opportunities().iloc[0:0]
+    return get_mock_opportunities()
+
+def get_mock_opportunities():
+    """Demo opportunities shown until a model and odds are available"""
     return pd.DataFrame([
         {
             'game': 'Lakers vs Celtics',
@@ -89,8 +179,23 @@ def get_opportunities():
         }
     ])
 
-def get_performance_data():
+@st.cache_data(ttl=DATA_TTL)
+def get_ledger_summary(version=None):
+    """Headline metrics from the ledger's running totals"""
+    conn = performance.connect()
+    if conn is None:
+        return None
+    try:
+        return performance.ledger_summary(conn)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=DATA_TTL)
+def get_performance_data(version=None):
     """Get historical performance data"""
+    weekly = query_ledger(performance.weekly_performance)
+    if weekly is not None:
+        return weekly
     return pd.DataFrame([
         {'week': 'Week 1', 'profit': 245, 'bets': 12, 'winRate': 58},
         {'week': 'Week 2', 'profit': -120, 'bets': 15, 'winRate': 47},
@@ -102,8 +207,12 @@ def get_performance_data():
         {'week': 'Week 8', 'profit': 625, 'bets': 19, 'winRate': 68}
     ])
 
-def get_accuracy_data():
+@st.cache_data(ttl=DATA_TTL)
+def get_accuracy_data(version=None):
     """Get model accuracy comparison"""
+    accuracy = query_ledger(performance.market_accuracy)
+    if accuracy is not None:
+        return accuracy
     return pd.DataFrame([
         {'category': 'Spreads', 'ourModel': 58.2, 'vegas': 52.4},
         {'category': 'Totals', 'ourModel': 61.3, 'vegas': 50.1},
@@ -111,7 +220,13 @@ def get_accuracy_data():
         {'category': 'Player Props', 'ourModel': 56.8, 'vegas': 51.2}
     ])
 
-def get_feature_importance():
+@st.cache_data(ttl=DATA_TTL)
+def get_clv_data(version=None):
+    """Closing-line value per market for settled bets, or None before any"""
+    return query_ledger(performance.clv_summary)
+
+@st.cache_data(ttl=DATA_TTL)
+def get_feature_importance(version=None):
     """Get feature importance data"""
     return pd.DataFrame([
         {'feature': 'Recent Form (L10)', 'importance': 23.4},
@@ -124,8 +239,12 @@ def get_feature_importance():
         {'feature': 'B2B Games', 'importance': 4.3}
     ])
 
-def get_roi_data():
+@st.cache_data(ttl=DATA_TTL)
+def get_roi_data(version=None):
     """Get cumulative ROI data"""
+    roi = query_ledger(performance.cumulative_roi, max_points=200)
+    if roi is not None:
+        return roi
     return pd.DataFrame([
         {'date': 'Nov 1', 'roi': 0, 'units': 0},
         {'date': 'Nov 8', 'roi': 2.3, 'units': 2.3},
@@ -137,8 +256,214 @@ def get_roi_data():
         {'date': 'Dec 20', 'roi': 14.7, 'units': 14.7}
     ])
 
+# Figures are memoized on their input frames
+@st.cache_data(max_entries=32)
+def roi_figure(roi_data):
+    """Cumulative ROI and units line chart"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=roi_data['date'],
+        y=roi_data['roi'],
+        mode='lines+markers',
+        name='ROI %',
+        line=dict(color='#3b82f6', width=3)
+    ))
+    fig.add_trace(go.Scatter(
+        x=roi_data['date'],
+        y=roi_data['units'],
+        mode='lines+markers',
+        name='Units Won',
+        line=dict(color='#10b981', width=3)
+    ))
+    fig.update_layout(
+        template='plotly_white',
+        height=400,
+        xaxis_title="Date",
+        yaxis_title="Value"
+    )
+    return fig
+
+@st.cache_data(max_entries=32)
+def weekly_figure(perf_data):
+    """Weekly profit and win rate bars"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=perf_data['week'],
+        y=perf_data['profit'],
+        name='Profit ($)',
+        marker_color='#10b981'
+    ))
+    fig.add_trace(go.Bar(
+        x=perf_data['week'],
+        y=perf_data['winRate'],
+        name='Win Rate (%)',
+        marker_color='#3b82f6'
+    ))
+    fig.update_layout(
+        template='plotly_white',
+        height=400,
+        xaxis_title="Week",
+        yaxis_title="Value"
+    )
+    return fig
+
+@st.cache_data(max_entries=32)
+def accuracy_figure(acc_data):
+    """Model vs Vegas accuracy bars"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=acc_data['category'],
+        y=acc_data['ourModel'],
+        name='Our Model',
+        marker_color='#10b981'
+    ))
+    fig.add_trace(go.Bar(
+        x=acc_data['category'],
+        y=acc_data['vegas'],
+        name='Vegas Lines',
+        marker_color='#ef4444'
+    ))
+    fig.update_layout(
+        template='plotly_white',
+        height=400,
+        xaxis_title="Bet Type",
+        yaxis_title="Accuracy (%)"
+    )
+    return fig
+
+@st.cache_data(max_entries=32)
+def feature_figure(feat_data):
+    """Feature importance bars"""
+    fig = go.Figure(go.Bar(
+        x=feat_data['importance'],
+        y=feat_data['feature'],
+        orientation='h',
+        marker_color='#8b5cf6'
+    ))
+    fig.update_layout(
+        template='plotly_white',
+        height=400,
+        xaxis_title="Importance (%)",
+        yaxis_title="Feature"
+    )
+    return fig
+
+def odds_version():
+    """Cheap change check on the odds store.
+
+    ``PRAGMA data_version`` changes whenever another connection commits,
+    and the snapshot sequence pins which scrape we are looking at; neither
+    touches the odds tables themselves.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    try:
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        snapshot_id = conn.execute("SELECT MAX(snapshot_id) FROM snapshots").fetchone()[0]
+    except sqlite3.Error:
+        return None
+    return (data_version, snapshot_id)
+
+def card_key(opp):
+    """Stable card id: the game and side, so a moved line updates the same card"""
+    if pd.notna(opp.get('game_id')):
+        return f"{opp['game_id']}|{opp['market']}|{opp['selection']}"
+    return f"{opp['game']}|{opp['bet']}"
+
+def card_signature(opp):
+    """Values shown on a card; a card re-renders only when these change"""
+    return (opp['bet'], opp['our_prob'], opp['market_prob'], opp['edge'], opp['ev'],
+            opp['odds'], opp['book'], opp['kelly'], opp['confidence'], opp['time'])
+
+def render_opportunity(opp, updated):
+    """Draw one opportunity card"""
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        st.subheader(f"🏀 {opp['game']}" + (" 🆕" if updated else ""))
+        st.caption(f"⏰ {opp['time']}")
+    
+    with col2:
+        confidence_color = {
+            'Very High': 'green',
+            'High': 'blue',
+            'Medium': 'orange',
+            'Low': 'red'
+        }
+        st.markdown(f"**Confidence:** :{confidence_color[opp['confidence']]}[{opp['confidence']}]")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Our Probability", f"{opp['our_prob']:.1f}%")
+    
+    with col2:
+        st.metric("Market Probability", f"{opp['market_prob']:.1f}%")
+    
+    with col3:
+        st.metric("Edge", f"+{opp['edge']:.1f}%", delta="Edge")
+    
+    with col4:
+        st.metric("Expected Value", f"+{opp['ev']:.1f}%")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.info(f"**Recommended Bet:** {opp['bet']}")
+        st.caption(f"{opp['book']} • {opp['odds']}")
+    
+    with col2:
+        st.success(f"**Kelly Criterion:** {opp['kelly']:.1f}% of bankroll")
+    
+    st.markdown("---")
+
+def refresh_opportunities(sport=None):
+    """Recompute opportunities if the odds store changed; True when it had.
+
+    Only odds_version() runs when nothing changed. Cards whose values
+    moved since the last refresh are marked as updated.
+    """
+    state = st.session_state
+    current = (odds_version(), sport)
+    stale = 'opps' not in state or state.get('odds_version') != current
+    metrics.cache('opportunities_panel', hit=not stale)
+    
+    if stale:
+        opps = get_opportunities(data_version(), sport)
+        previous = state.get('card_signatures', {})
+        signatures = {card_key(opp): card_signature(opp) for _, opp in opps.iterrows()}
+        state.updated_cards = {
+            card_id for card_id, sig in signatures.items()
+            if previous and previous.get(card_id) != sig
+        }
+        state.card_signatures = signatures
+        state.opps = opps
+        state.odds_version = current
+    return stale
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def opportunities_panel(min_edge, sport=None):
+    """Opportunities tab, rerun on its own timer without touching other tabs.
+
+    Each tick only runs odds_version(); opportunities are recomputed when
+    the store has changed. Cards keep a key per game and side, so ones
+    whose quote is unchanged stay as they are in the browser.
+    """
+    refresh_opportunities(sport)
+    state = st.session_state
+    opps = state.opps[state.opps['edge'] >= min_edge]
+    
+    for _, opp in opps.iterrows():
+        card_id = card_key(opp)
+        with st.container(key=f"opp-{card_id}"):
+            render_opportunity(opp, card_id in state.updated_cards)
+
 # Main app
 def main():
+    version = data_version()
+    summary = get_ledger_summary(version)
+    
     # Title
     st.title("🏀 Sports Betting Edge Finder")
     st.markdown("### ML-Powered System to Identify Mispriced Lines & Generate Alpha")
@@ -146,15 +471,21 @@ def main():
     # Sidebar
     with st.sidebar:
         st.header("⚙️ Settings")
-        sport = st.selectbox("Sport", ["NBA", "NFL", "MLB", "NHL"])
+        sport = SPORT_KEYS[st.selectbox("Sport", list(SPORT_KEYS))]
         timeframe = st.selectbox("Timeframe", ["Today", "This Week", "This Month"])
         min_edge = st.slider("Minimum Edge %", 0.0, 15.0, 3.0, 0.5)
         
         st.markdown("---")
         st.header("📊 Quick Stats")
-        st.metric("Total Profit", "$2,530", "+12.4%")
-        st.metric("Win Rate", "59.8%", "+7.4% vs Vegas")
-        st.metric("ROI", "14.7%", "Season")
+        if summary is not None:
+            st.metric("Total Profit", f"${summary['profit']:,.0f}")
+            st.metric("Win Rate", f"{summary['win_rate']:.1f}%",
+                      f"{summary['win_rate'] - summary['market_rate']:+.1f}% vs Vegas")
+            st.metric("ROI", f"{summary['roi']:.1f}%", "Season")
+        else:
+            st.metric("Total Profit", "$2,530", "+12.4%")
+            st.metric("Win Rate", "59.8%", "+7.4% vs Vegas")
+            st.metric("ROI", "14.7%", "Season")
     
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -162,28 +493,28 @@ def main():
     with col1:
         st.metric(
             label="💰 Total Profit",
-            value="$2,530",
-            delta="+$625 this week"
+            value=f"${summary['profit']:,.0f}" if summary else "$2,530",
+            delta=f"{summary['week_profit']:+,.0f} this week" if summary else "+$625 this week"
         )
     
     with col2:
         st.metric(
             label="🎯 Win Rate",
-            value="59.8%",
-            delta="+7.4% vs Vegas"
+            value=f"{summary['win_rate']:.1f}%" if summary else "59.8%",
+            delta=f"{summary['win_rate'] - summary['market_rate']:+.1f}% vs Vegas" if summary else "+7.4% vs Vegas"
         )
     
     with col3:
         st.metric(
             label="📈 ROI",
-            value="14.7%",
-            delta="+2.1% this month"
+            value=f"{summary['roi']:.1f}%" if summary else "14.7%",
+            delta=f"{summary['pending']} pending" if summary else "+2.1% this month"
         )
     
     with col4:
         st.metric(
             label="🔥 High-Edge Plays",
-            value="3",
+            value=str(int((get_opportunities(version, sport)['edge'] >= 6).sum())),
             delta="Today"
         )
     
@@ -200,50 +531,7 @@ def main():
     # Tab 1: Opportunities
     with tab1:
         st.header("Today's Edge Opportunities")
-        
-        opps = get_opportunities()
-        
-        for idx, opp in opps.iterrows():
-            with st.container():
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.subheader(f"🏀 {opp['game']}")
-                    st.caption(f"⏰ {opp['time']}")
-                
-                with col2:
-                    confidence_color = {
-                        'Very High': 'green',
-                        'High': 'blue',
-                        'Medium': 'orange',
-                        'Low': 'red'
-                    }
-                    st.markdown(f"**Confidence:** :{confidence_color[opp['confidence']]}[{opp['confidence']}]")
-                
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("Our Probability", f"{opp['our_prob']:.1f}%")
-                
-                with col2:
-                    st.metric("Market Probability", f"{opp['market_prob']:.1f}%")
-                
-                with col3:
-                    st.metric("Edge", f"+{opp['edge']:.1f}%", delta="Edge")
-                
-                with col4:
-                    st.metric("Expected Value", f"+{opp['ev']:.1f}%")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.info(f"**Recommended Bet:** {opp['bet']}")
-                    st.caption(f"{opp['book']} • {opp['odds']}")
-                
-                with col2:
-                    st.success(f"**Kelly Criterion:** {opp['kelly']:.1f}% of bankroll")
-                
-                st.markdown("---")
+        opportunities_panel(min_edge, sport)
     
     # Tab 2: Performance
     with tab2:
@@ -251,82 +539,40 @@ def main():
         
         # ROI Chart
         st.subheader("Cumulative ROI & Units Won")
-        roi_data = get_roi_data()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=roi_data['date'],
-            y=roi_data['roi'],
-            mode='lines+markers',
-            name='ROI %',
-            line=dict(color='#3b82f6', width=3)
-        ))
-        fig.add_trace(go.Scatter(
-            x=roi_data['date'],
-            y=roi_data['units'],
-            mode='lines+markers',
-            name='Units Won',
-            line=dict(color='#10b981', width=3)
-        ))
-        fig.update_layout(
-            template='plotly_white',
-            height=400,
-            xaxis_title="Date",
-            yaxis_title="Value"
-        )
+        roi_data = get_roi_data(version)
+        fig = roi_figure(roi_data)
         st.plotly_chart(fig, use_container_width=True)
         
         # Weekly breakdown
         st.subheader("Weekly Performance Breakdown")
-        perf_data = get_performance_data()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=perf_data['week'],
-            y=perf_data['profit'],
-            name='Profit ($)',
-            marker_color='#10b981'
-        ))
-        fig.add_trace(go.Bar(
-            x=perf_data['week'],
-            y=perf_data['winRate'],
-            name='Win Rate (%)',
-            marker_color='#3b82f6'
-        ))
-        fig.update_layout(
-            template='plotly_white',
-            height=400,
-            xaxis_title="Week",
-            yaxis_title="Value"
-        )
+        perf_data = get_performance_data(version)
+        fig = weekly_figure(perf_data)
         st.plotly_chart(fig, use_container_width=True)
+        
+        # Closing line value
+        clv_data = get_clv_data(version)
+        if clv_data is not None:
+            st.subheader("Closing Line Value")
+            st.dataframe(
+                clv_data.rename(columns={
+                    'market': 'Market',
+                    'bets': 'Bets',
+                    'beat_close_pct': 'Beat Close %',
+                    'avg_clv_price': 'Avg CLV %',
+                    'beat_consensus_pct': 'Beat Consensus %',
+                    'avg_clv_consensus': 'Avg CLV vs Consensus %'
+                }).round(2),
+                hide_index=True,
+                use_container_width=True
+            )
     
     # Tab 3: Accuracy
     with tab3:
         st.header("Model Accuracy vs Vegas Lines")
         st.markdown("Our model consistently outperforms market odds across all bet types")
         
-        acc_data = get_accuracy_data()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=acc_data['category'],
-            y=acc_data['ourModel'],
-            name='Our Model',
-            marker_color='#10b981'
-        ))
-        fig.add_trace(go.Bar(
-            x=acc_data['category'],
-            y=acc_data['vegas'],
-            name='Vegas Lines',
-            marker_color='#ef4444'
-        ))
-        fig.update_layout(
-            template='plotly_white',
-            height=400,
-            xaxis_title="Bet Type",
-            yaxis_title="Accuracy (%)"
-        )
+        acc_data = get_accuracy_data(version)
+        fig = accuracy_figure(acc_data)
         st.plotly_chart(fig, use_container_width=True)
         
         # Summary stats
@@ -346,20 +592,8 @@ def main():
         st.header("Feature Importance Analysis")
         st.markdown("Key factors driving our predictions (from XGBoost model)")
         
-        feat_data = get_feature_importance()
-        
-        fig = go.Figure(go.Bar(
-            x=feat_data['importance'],
-            y=feat_data['feature'],
-            orientation='h',
-            marker_color='#8b5cf6'
-        ))
-        fig.update_layout(
-            template='plotly_white',
-            height=400,
-            xaxis_title="Importance (%)",
-            yaxis_title="Feature"
-        )
+        feat_data = get_feature_importance(version)
+        fig = feature_figure(feat_data)
         st.plotly_chart(fig, use_container_width=True)
         
         # Model details
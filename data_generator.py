@@ -1,126 +1,143 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config
+from settings import config
+import registry
 
-def generate_historical_data():
+# Compact dtypes for the historical games file, shared by every reader
+HISTORY_DTYPES = {
+    'home_team': 'category', 'away_team': 'category',
+    'home_ppg': 'float32', 'away_ppg': 'float32',
+    'home_def_rating': 'float32', 'away_def_rating': 'float32',
+    'home_form_l10': 'float32', 'away_form_l10': 'float32',
+    'home_rest_days': 'int8', 'away_rest_days': 'int8',
+    'home_injury_impact': 'float32', 'away_injury_impact': 'float32',
+    'pace': 'float32',
+    'home_3pt_pct': 'float32', 'away_3pt_pct': 'float32',
+    'is_home': 'int8', 'home_win': 'int8',
+    'home_score': 'int16', 'away_score': 'int16', 'total_points': 'int16',
+    'home_ml_odds': 'int16', 'away_ml_odds': 'int16',
+    'vegas_home_prob': 'float32',
+    'spread_line': 'float32', 'total_line': 'float32',
+    'home_cover': 'int8', 'over': 'int8'
+}
+
+def read_history(path=None, columns=None):
+    """Read the historical games file with compact dtypes and shared team codes"""
+    path = path or config.HISTORICAL_DATA_PATH
+    dtypes = {c: t for c, t in HISTORY_DTYPES.items() if columns is None or c in columns}
+    df = pd.read_csv(path, usecols=columns, dtype=dtypes,
+                     parse_dates=['game_date'] if columns is None or 'game_date' in columns else False)
+    for column in ('home_team', 'away_team'):
+        if column in df:
+            df[column] = registry.teams.categorical(df[column])
+    return df
+
+def generate_historical_data(n_games=2000, output_path=None):
     """Generate synthetic historical game data for training"""
+    output_path = output_path or config.HISTORICAL_DATA_PATH
     print("GENERATING HISTORICAL TRAINING DATA")
     
+    rng = np.random.RandomState(42)
+    n_teams = len(registry.NBA_TEAMS)
+    
+    print(f"\nGenerating {n_games} historical games...")
+    
+    # Away team is any team but the home team
+    home_code = rng.randint(0, n_teams, n_games).astype(np.int16)
+    away_code = ((home_code + rng.randint(1, n_teams, n_games)) % n_teams).astype(np.int16)
+    game_date = np.datetime64('2023-10-01') + (np.arange(n_games) % 180).astype('timedelta64[D]')
+    
+    def normal(mean, std):
+        return rng.normal(mean, std, n_games).astype(np.float32)
+    
+    def uniform(low, high):
+        return rng.uniform(low, high, n_games).astype(np.float32)
+    
+    def rest_days():
+        return rng.choice(np.arange(5, dtype=np.int8), n_games, p=[0.15, 0.35, 0.25, 0.15, 0.10])
     
-    # NBA teams
-    teams = [
-        'Boston Celtics', 'Brooklyn Nets', 'New York Knicks', 'Philadelphia 76ers', 'Toronto Raptors',
-        'Chicago Bulls', 'Cleveland Cavaliers', 'Detroit Pistons', 'Indiana Pacers', 'Milwaukee Bucks',
-        'Atlanta Hawks', 'Charlotte Hornets', 'Miami Heat', 'Orlando Magic', 'Washington Wizards',
-        'Denver Nuggets', 'Minnesota Timberwolves', 'Oklahoma City Thunder', 'Portland Trail Blazers', 'Utah Jazz',
-        'Golden State Warriors', 'LA Clippers', 'Los Angeles Lakers', 'Phoenix Suns', 'Sacramento Kings',
-        'Dallas Mavericks', 'Houston Rockets', 'Memphis Grizzlies', 'New Orleans Pelicans', 'San Antonio Spurs'
-    ]
-    
-    np.random.seed(42)
-    
-    games = []
-    start_date = datetime(2023, 10, 1)
-    
-    print("\nGenerating 2000 historical games...")
-    
-    for i in range(2000):
-        home_team = np.random.choice(teams)
-        away_team = np.random.choice([t for t in teams if t != home_team])
-        
-        game_date = start_date + timedelta(days=i % 180)
-        
-        # Generate realistic stats
-        home_ppg = np.random.normal(112, 8)
-        away_ppg = np.random.normal(112, 8)
-        
-        home_def_rating = np.random.normal(110, 5)
-        away_def_rating = np.random.normal(110, 5)
-        
-        home_form = np.random.uniform(0.3, 0.8)
-        away_form = np.random.uniform(0.3, 0.8)
-        
-        home_rest = np.random.choice([0, 1, 2, 3, 4], p=[0.15, 0.35, 0.25, 0.15, 0.10])
-        away_rest = np.random.choice([0, 1, 2, 3, 4], p=[0.15, 0.35, 0.25, 0.15, 0.10])
-        
-        home_injury_impact = np.random.uniform(0.7, 1.0)
-        away_injury_impact = np.random.uniform(0.7, 1.0)
-        
-        pace = np.random.normal(100, 5)
-        
-        home_3pt_pct = np.random.normal(0.36, 0.03)
-        away_3pt_pct = np.random.normal(0.36, 0.03)
-        
-        # Determine winner (home court advantage)
-        home_advantage = 3.5
-        home_strength = home_ppg - away_def_rating + home_form * 10 + home_rest * 0.5 + home_advantage
-        away_strength = away_ppg - home_def_rating + away_form * 10 + away_rest * 0.5
-        
-        home_win_prob = 1 / (1 + np.exp(-(home_strength - away_strength) / 10))
-        home_win = 1 if np.random.random() < home_win_prob else 0
-        
-        # Generate score
-        if home_win:
-            home_score = int(np.random.normal(home_ppg + 3, 5))
-            away_score = int(np.random.normal(away_ppg - 3, 5))
-        else:
-            home_score = int(np.random.normal(home_ppg - 3, 5))
-            away_score = int(np.random.normal(away_ppg + 3, 5))
-        
-        total_points = home_score + away_score
-        
-        # Generate odds (implied probability with vig)
-        true_prob = home_win_prob
-        implied_prob = true_prob * 1.05  # Add bookmaker vig
-        
-        if implied_prob > 0.5:
-            home_ml = int(-100 * implied_prob / (1 - implied_prob))
-            away_ml = int(100 * (1 - implied_prob) / implied_prob)
-        else:
-            home_ml = int(100 * (1 - implied_prob) / implied_prob)
-            away_ml = int(-100 * implied_prob / (1 - implied_prob))
-        
-        games.append({
-            'game_date': game_date,
-            'home_team': home_team,
-            'away_team': away_team,
-            'home_ppg': home_ppg,
-            'away_ppg': away_ppg,
-            'home_def_rating': home_def_rating,
-            'away_def_rating': away_def_rating,
-            'home_form_l10': home_form,
-            'away_form_l10': away_form,
-            'home_rest_days': home_rest,
-            'away_rest_days': away_rest,
-            'home_injury_impact': home_injury_impact,
-            'away_injury_impact': away_injury_impact,
-            'pace': pace,
-            'home_3pt_pct': home_3pt_pct,
-            'away_3pt_pct': away_3pt_pct,
-            'is_home': 1,
-            'home_win': home_win,
-            'home_score': home_score,
-            'away_score': away_score,
-            'total_points': total_points,
-            'home_ml_odds': home_ml,
-            'away_ml_odds': away_ml,
-            'vegas_home_prob': implied_prob
-        })
-    
-    df = pd.DataFrame(games)
+    # Generate realistic stats
+    home_ppg, away_ppg = normal(112, 8), normal(112, 8)
+    home_def_rating, away_def_rating = normal(110, 5), normal(110, 5)
+    home_form, away_form = uniform(0.3, 0.8), uniform(0.3, 0.8)
+    home_rest, away_rest = rest_days(), rest_days()
+    home_injury_impact, away_injury_impact = uniform(0.7, 1.0), uniform(0.7, 1.0)
+    pace = normal(100, 5)
+    home_3pt_pct, away_3pt_pct = normal(0.36, 0.03), normal(0.36, 0.03)
+    
+    # Determine winner (home court advantage)
+    home_advantage = 3.5
+    home_strength = home_ppg - away_def_rating + home_form * 10 + home_rest * 0.5 + home_advantage
+    away_strength = away_ppg - home_def_rating + away_form * 10 + away_rest * 0.5
+    
+    home_win_prob = 1 / (1 + np.exp(-(home_strength - away_strength) / 10))
+    home_win = (rng.random_sample(n_games) < home_win_prob).astype(np.int8)
+    
+    # Generate score; the winner gets the +3
+    swing = np.where(home_win == 1, 3, -3)
+    home_score = rng.normal(home_ppg + swing, 5).astype(np.int16)
+    away_score = rng.normal(away_ppg - swing, 5).astype(np.int16)
+    total_points = home_score + away_score
+    
+    # Generate odds (implied probability with vig), clipped so lopsided
+    # games stay within int16 odds
+    implied_prob = (home_win_prob * 1.05).astype(np.float32)
+    capped = np.clip(implied_prob, 0.01, 0.99)
+    favorite = -100 * capped / (1 - capped)
+    underdog = 100 * (1 - capped) / capped
+    home_ml = np.where(capped > 0.5, favorite, underdog).astype(np.int16)
+    away_ml = np.where(capped > 0.5, underdog, favorite).astype(np.int16)
+    
+    # Closing spread (home line) and total: the expected margin and points
+    # (int16 scores truncate about half a point each) plus book noise, on
+    # the half point so nothing pushes
+    expected_margin = home_ppg - away_ppg + 6 * (2 * home_win_prob - 1)
+    expected_total = home_ppg + away_ppg - 1
+    spread_line = (np.floor(-expected_margin + rng.normal(0, 3, n_games)) + 0.5).astype(np.float32)
+    total_line = (np.floor(expected_total + rng.normal(0, 4, n_games)) + 0.5).astype(np.float32)
+    home_cover = (home_score + spread_line > away_score).astype(np.int8)
+    over = (total_points > total_line).astype(np.int8)
+    
+    df = pd.DataFrame({
+        'game_date': game_date,
+        'home_team': registry.teams.from_codes(home_code),
+        'away_team': registry.teams.from_codes(away_code),
+        'home_ppg': home_ppg,
+        'away_ppg': away_ppg,
+        'home_def_rating': home_def_rating,
+        'away_def_rating': away_def_rating,
+        'home_form_l10': home_form,
+        'away_form_l10': away_form,
+        'home_rest_days': home_rest,
+        'away_rest_days': away_rest,
+        'home_injury_impact': home_injury_impact,
+        'away_injury_impact': away_injury_impact,
+        'pace': pace,
+        'home_3pt_pct': home_3pt_pct,
+        'away_3pt_pct': away_3pt_pct,
+        'is_home': np.ones(n_games, dtype=np.int8),
+        'home_win': home_win,
+        'home_score': home_score,
+        'away_score': away_score,
+        'total_points': total_points,
+        'home_ml_odds': home_ml,
+        'away_ml_odds': away_ml,
+        'vegas_home_prob': implied_prob,
+        'spread_line': spread_line,
+        'total_line': total_line,
+        'home_cover': home_cover,
+        'over': over
+    })
     
     # Create data directory
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
     
     # Save to CSV
-    df.to_csv(config.HISTORICAL_DATA_PATH, index=False)
+    df.to_csv(output_path, index=False)
     
     print(f"✓ Generated {len(df)} games")
-    print(f"✓ Saved to: {config.HISTORICAL_DATA_PATH}")
+    print(f"✓ Saved to: {output_path}")
     
     # Display stats
     
@@ -128,13 +145,15 @@ def generate_historical_data():
     
     print(f"Total games: {len(df)}")
     print(f"Home win rate: {df['home_win'].mean() * 100:.1f}%")
+    print(f"Home cover rate: {df['home_cover'].mean() * 100:.1f}%")
+    print(f"Over rate: {df['over'].mean() * 100:.1f}%")
     print(f"Average total points: {df['total_points'].mean():.1f}")
     print(f"Date range: {df['game_date'].min()} to {df['game_date'].max()}")
     print("\nSample data:")
     print(df.head())
     
     print("\n✓ Data generation complete!")
-    
+    return df
 
 if __name__ == "__main__":
     generate_historical_data()
\ No newline at end of file
@@ -1,32 +1,52 @@
+import argparse
 import pandas as pd
 import numpy as np
-import joblib
-import sqlite3
 import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config
+import sqlite3
+from settings import config
+from model_store import ModelStore
+from prediction_cache import PredictionCache
+from odds_store import OddsStore
+from bet_ledger import BetLedger
+from features import TeamFeatures, consensus_lines, history_version
+from odds_math import american_to_prob, expected_value, kelly_fraction
+from registry import MARKETS, OUTCOMES
+import registry
+import metrics
 
 class EdgeFinder:
-    def __init__(self):
+    def __init__(self, models=None, predictions=None):
+        self.models = models if models is not None else ModelStore()
+        self.predictions = predictions if predictions is not None else PredictionCache()
+        # Model path -> version last scored, to spot reloads
+        self._versions = {}
         self.model = None
         self.feature_names = None
+        self.model_version = None
+        self.team_features = None
         self.load_model()
     
     def load_model(self):
-        """Load trained model"""
-        model_path = 'models/betting_model.pkl'
+        """Load the default model; per-sport models load when first scored"""
+        entry = self.models.get()
         
-        if not os.path.exists(model_path):
+        if entry is None:
+            if self.models.available():
+                print(f"✓ {len(self.models.available())} per-sport models available")
+                return True
             print(f"✗ Model not found. Run 'python src/model_training.py' first")
             return False
         
-        data = joblib.load(model_path)
-        self.model = data['model']
-        self.feature_names = data['feature_names']
+        self.model = entry['model']
+        self.feature_names = entry['feature_names']
+        self.model_version = entry['model_version']
         print("✓ Model loaded successfully")
         return True
     
+    def has_models(self):
+        """Whether any model, default or per-sport, can score"""
+        return self.model is not None or bool(self.models.available())
+    
     def american_to_prob(self, odds):
         """Convert American odds to implied probability"""
         if odds > 0:
@@ -124,40 +144,208 @@ class EdgeFinder:
         
         return pd.DataFrame(opportunities)
     
-    def find_opportunities(self):
-        """Find all betting opportunities"""
-        if self.model is None:
+    def score_board(self, board, min_edge=None):
+        """Score a long odds board (one row per price) in one batch.
+
+        Builds a feature row per game once, runs each sport's moneyline,
+        spread and total models over it and prices every quote of the
+        three markets against them. Returns the best book per game,
+        market and side whose edge clears ``min_edge``, in the same
+        columns as the mock opportunities plus the ledger keys and the
+        version of the model that scored it.
+        """
+        if not self.has_models() or board.empty:
             return pd.DataFrame()
+        games, X = self.board_features(board)
+        if X is None:
+            return pd.DataFrame()
+        return self.score_features(board, games, X, min_edge)
+    
+    def board_features(self, board):
+        """One row per game on the board and its model features"""
+        # Rebuild features when the history file changes; cached
+        # predictions made from the old features are dropped with them
+        if self.team_features is None or self.team_features.version != history_version():
+            if self.team_features is not None:
+                self.predictions.invalidate()
+            self.team_features = TeamFeatures.from_history()
         
-        # Try to load real odds data
-        if os.path.exists(config.ODDS_DB_PATH):
-            conn = sqlite3.connect(config.ODDS_DB_PATH)
-            query = "SELECT * FROM odds_history WHERE fetch_timestamp = (SELECT MAX(fetch_timestamp) FROM odds_history)"
+        games = board[['game_id', 'sport', 'commence_time', 'home_team', 'away_team']]
+        games = games.drop_duplicates('game_id').reset_index(drop=True)
+        if self.team_features is None:
+            return games, None
+        X = self.team_features.build(games)
+        lines = consensus_lines(board, games['game_id'])
+        for column in lines:
+            X[column] = lines[column].to_numpy()
+        return games, X
+    
+    def predict_games(self, games, X, market='h2h'):
+        """Home (moneyline, spread) or over (total) probability per game.
+
+        Games are grouped by sport so every model runs once on one batch,
+        and only on rows the prediction cache has not seen for that model
+        file and version. Games whose sport has no model for the market get
+        NaN (and so never clear an edge). Returns the probabilities and the
+        model version behind each.
+        """
+        probs = np.full(len(games), np.nan, dtype=np.float32)
+        versions = np.full(len(games), None, dtype=object)
+        
+        for sport, rows in games.groupby('sport', observed=True, sort=False).indices.items():
+            entry = self.models.get(str(sport), market)
+            if entry is None:
+                continue
+            # Markets trained together share a version, so the file is part of the key
+            key = f"{entry['path']}@{entry['model_version']}"
+            previous = self._versions.get(entry['path'])
+            if previous is not None and previous != key:
+                self.predictions.invalidate(previous)
+            self._versions[entry['path']] = key
             
+            batch = X.iloc[rows][entry['feature_names']]
+            probs[rows] = self.predictions.predict(key, batch,
+                                                   lambda b: self._infer(entry['model'], b, sport, market))
+            versions[rows] = entry['model_version']
+        
+        return probs, versions
+    
+    def _infer(self, model, batch, sport, market='h2h'):
+        with metrics.span('inference', sport=str(sport), market=market):
+            probs = model.predict_proba(batch)[:, 1]
+        metrics.count('rows_processed', len(batch), stage='inference')
+        return probs
+    
+    def score_features(self, board, games, X, min_edge=None):
+        """Run every market's models on prepared features and price the board.
+
+        Moneylines are priced against the home win probability, spreads
+        against the home cover and totals against the over. Spread and
+        total quotes count only at the game's consensus line (the
+        ``spread_line``/``total_line`` features), the number the models
+        priced.
+        """
+        min_edge = config.MIN_EDGE if min_edge is None else min_edge
+        
+        probs, versions = zip(*(self.predict_games(games, X, market) for market in MARKETS))
+        
+        with metrics.span('edge'):
+            market = registry.markets.codes(board['market'])
+            outcome = registry.outcomes.codes(board['outcome'])
+            quotes = (market >= 0) & (market < len(MARKETS)) & (outcome >= 0) & (outcome < len(OUTCOMES))
+            game = pd.Index(games['game_id']).get_indexer(board['game_id'])
+            # Home or over: the side each market's model gives the probability of
+            first = np.isin(outcome, (OUTCOMES.index('home'), OUTCOMES.index('over')))
+            odds = board['price'].to_numpy(dtype=np.float32)
+            point = board['point'].to_numpy(dtype=np.float32)
+            
+            m = np.clip(market, 0, len(MARKETS) - 1)
+            prob = np.stack(probs)[m, game]
+            our_prob = np.where(first, prob, 1 - prob).astype(np.float32)
+            
+            # Away spreads quote the home line negated
+            line = np.stack([np.full(len(X), np.nan, dtype=np.float32),
+                             X['spread_line'].to_numpy(dtype=np.float32),
+                             X['total_line'].to_numpy(dtype=np.float32)])[m, game]
+            home_point = np.where((m == MARKETS.index('spreads')) & ~first, -point, point)
+            on_line = (m == MARKETS.index('h2h')) | (home_point == line)
+            
+            rows = np.flatnonzero(quotes & on_line & ~np.isnan(our_prob))
+            game, m, first, odds, point = game[rows], m[rows], first[rows], odds[rows], point[rows]
+            our_prob = our_prob[rows]
+            market_prob = american_to_prob(odds).astype(np.float32)
+            edge = (our_prob - market_prob) * 100
+            
+            # Best price per game, market and side: the lowest implied
+            # probability across books (lexsort is stable, so ties keep
+            # board order)
+            side = (game * len(MARKETS) + m) * 2 + first
+            order = np.lexsort((market_prob, side))
+            best_of_side = np.ones(len(order), dtype=bool)
+            best_of_side[1:] = side[order][1:] != side[order][:-1]
+            best = order[best_of_side]
+            best = best[edge[best] >= min_edge]
+            if len(best) == 0:
+                return pd.DataFrame()
+            
+            picked = games.iloc[game[best]].reset_index(drop=True)
+            m, side_first, point = m[best], first[best], point[best]
+            home_team = picked['home_team'].astype(str)
+            away_team = picked['away_team'].astype(str)
+            team = home_team.where(side_first, away_team)
+            spread = team + ' ' + pd.Series(point).map('{:+g}'.format)
+            total = pd.Series(np.where(side_first, 'Over ', 'Under ')) + pd.Series(point).map('{:g}'.format)
+            is_market = [m == i for i in range(len(MARKETS))]
+            our_prob, market_prob, edge, odds = our_prob[best], market_prob[best], edge[best], odds[best]
+            opportunities = pd.DataFrame({
+                'game': away_team + ' @ ' + home_team,
+                'time': pd.to_datetime(picked['commence_time'].astype(str), utc=True)
+                          .dt.strftime('%b %d %H:%M UTC'),
+                'prediction': np.select(is_market, [team + ' Win', spread, total], None),
+                'our_prob': our_prob * 100,
+                'market_prob': market_prob * 100,
+                'edge': edge,
+                'recommended_bet': np.select(is_market, [team + ' ML', spread, total], None),
+                'odds': odds.astype(np.int32),
+                'bookmaker': np.asarray(board['book'], dtype=object)[rows[best]],
+                'confidence': np.select([edge >= 10, edge >= 6, edge >= 3],
+                                        ['Very High', 'High', 'Medium'], 'Low'),
+                'kelly_size': kelly_fraction(our_prob, odds) * 100,
+                'expected_value': expected_value(our_prob, odds),
+                'game_id': picked['game_id'].astype(str),
+                'sport': picked['sport'],
+                'commence_time': picked['commence_time'].astype(str),
+                'home_team': picked['home_team'],
+                'away_team': picked['away_team'],
+                'market': np.asarray(MARKETS, dtype=object)[m],
+                'selection': np.asarray(OUTCOMES, dtype=object)[outcome[rows[best]]],
+                'line': np.where(m == MARKETS.index('h2h'), np.nan, point),
+                'model_version': np.stack(versions)[m, game[best]]
+            })
+        return opportunities.sort_values('edge', ascending=False).reset_index(drop=True)
+    
+    def find_opportunities(self, sport=None, min_edge=None):
+        """Find betting opportunities, optionally for one sport.
+
+        ``min_edge`` (% points, default ``config.MIN_EDGE``) applies to
+        scored odds; demo cards are returned as they are.
+        """
+        if not self.has_models():
+            return pd.DataFrame()
+        
+        # Real odds, when stored, are scored; demo cards only stand in
+        # for a missing or empty store
+        if os.path.exists(config.ODDS_DB_PATH):
             try:
-                odds_df = pd.read_sql_query(query, conn)
-                conn.close()
-                
-                if not odds_df.empty:
-                    print(f"✓ Found {len(odds_df)} games in database")
-                    # Process real odds here...
-                    # For now, return mock data
-                    return self.create_mock_opportunities()
-            except:
-                conn.close()
+                board = OddsStore(config.ODDS_DB_PATH).get_snapshot(sport=sport)
+            except sqlite3.Error as e:
+                print(f"✗ Could not read odds from {config.ODDS_DB_PATH}: {e}")
+                return pd.DataFrame()
+            
+            if not board.empty:
+                print(f"✓ Found {board['game_id'].nunique()} games in database")
+                opportunities = self.score_board(board, min_edge)
+                if self.team_features is None:
+                    print(f"✗ Historical data not found at {config.HISTORICAL_DATA_PATH}")
+                return opportunities
+        
+        # Demo opportunities are NBA games
+        if sport not in (None, 'basketball_nba'):
+            return pd.DataFrame()
         
         # Return mock opportunities
-        return self.create_mock_opportunities()
+        with metrics.span('edge'):
+            return self.create_mock_opportunities()
 
-def main():
-    """Main execution"""
+def main(record=False):
+    """Main execution; ``record`` stores the opportunities as bets in the ledger"""
     print("=" * 60)
     print("BETTING EDGE FINDER")
     print("=" * 60)
     
     finder = EdgeFinder()
     
-    if finder.model is None:
+    if not finder.has_models():
         return
     
     print(f"\nSearching for edges > {config.MIN_EDGE}%...")
@@ -195,8 +383,15 @@ def main():
     print(f"\nTotal opportunities: {len(opportunities)}")
     print(f"Average edge: +{opportunities['edge'].mean():.1f}%")
     print(f"Average EV: +{opportunities['expected_value'].mean():.1f}%")
+    
+    if record:
+        recorded = BetLedger().record(opportunities)
+        if recorded:
+            print(f"✓ Recorded {recorded} new bets in the ledger")
     print("\nNext step: Run 'streamlit run dashboard/app.py' to view dashboard")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Find betting edges in the latest odds")
+    parser.add_argument('--record', action='store_true', help="record the opportunities as bets in the ledger")
+    main(record=parser.parse_args().record)
     
\ No newline at end of file
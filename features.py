@@ -0,0 +1,96 @@
+import pandas as pd
+import numpy as np
+import os
+from settings import config
+from data_generator import read_history
+import registry
+import metrics
+
+# Per-team stats in the training data, stored as home_<stat>/away_<stat>
+TEAM_STATS = ['ppg', 'def_rating', 'form_l10', 'rest_days', 'injury_impact', '3pt_pct']
+
+
+def history_version(path=None):
+    """Version tag of the historical games file (its mtime), or None if missing"""
+    path = path or config.HISTORICAL_DATA_PATH
+    return str(int(os.path.getmtime(path))) if os.path.exists(path) else None
+
+
+def consensus_lines(board, game_ids):
+    """Most quoted home spread and total per game (NaN where a market is not offered).
+
+    These are the ``spread_line`` and ``total_line`` features; when books
+    are split evenly the lower number wins.
+    """
+    game_ids = pd.Index(game_ids)
+    game = game_ids.get_indexer(board['game_id'])
+    point = board['point'].to_numpy(dtype=np.float64)
+    lines = pd.DataFrame(index=game_ids)
+    for column, market, outcome in (('spread_line', 'spreads', 'home'), ('total_line', 'totals', 'over')):
+        quoted = ((board['market'] == market) & (board['outcome'] == outcome)).to_numpy() & ~np.isnan(point)
+        pairs, books = np.unique(np.column_stack([game[quoted], point[quoted]]), axis=0, return_counts=True)
+        # Per game: most books first, then the lower line
+        order = np.lexsort((pairs[:, 1], -books, pairs[:, 0]))
+        pairs = pairs[order]
+        first = np.ones(len(pairs), dtype=bool)
+        first[1:] = pairs[1:, 0] != pairs[:-1, 0]
+        values = np.full(len(game_ids), np.nan, dtype=np.float32)
+        values[pairs[first, 0].astype(np.intp)] = pairs[first, 1]
+        lines[column] = values
+    return lines
+
+
+class TeamFeatures:
+    """Latest known stats per team, used to build model rows for live games.
+
+    Built once from the historical games file: each team's most recent
+    game (home or away) supplies its stats and pace. The table is indexed
+    by registry team code and held as float32. Teams never seen fall back
+    to the league average. ``version`` changes whenever the source file
+    does, so callers can tell when features were refreshed.
+    """
+
+    def __init__(self, table, version=None):
+        self.table = table
+        self.defaults = table.mean()
+        self.version = version
+
+    @classmethod
+    def from_history(cls, path=None):
+        """Load the feature table from the historical games CSV"""
+        path = path or config.HISTORICAL_DATA_PATH
+        if not os.path.exists(path):
+            return None
+
+        columns = ['game_date', 'pace'] + [f'{side}_{stat}' for side in ('home', 'away')
+                                           for stat in ['team'] + TEAM_STATS]
+        df = read_history(path, columns=columns)
+        sides = []
+        for side in ('home', 'away'):
+            part = df[['game_date', 'pace'] + [f'{side}_{s}' for s in TEAM_STATS]]
+            part.columns = ['game_date', 'pace'] + TEAM_STATS
+            sides.append(part.assign(team=registry.teams.codes(df[f'{side}_team'])))
+
+        teams = pd.concat(sides, ignore_index=True)
+        # Stable sort keeps the away row after the home row on the same date
+        teams = teams.sort_values('game_date', kind='stable').drop_duplicates('team', keep='last')
+        table = teams.set_index('team')[TEAM_STATS + ['pace']].astype(np.float32)
+        return cls(table, version=history_version(path))
+
+    def build(self, games, feature_names=None):
+        """Model feature rows for ``games`` (needs home_team and away_team)"""
+        with metrics.span('feature_build'):
+            home = self.table.reindex(registry.teams.codes(games['home_team'])).fillna(self.defaults)
+            away = self.table.reindex(registry.teams.codes(games['away_team'])).fillna(self.defaults)
+
+            X = pd.DataFrame(index=games.index)
+            for stat in TEAM_STATS:
+                X[f'home_{stat}'] = home[stat].values
+                X[f'away_{stat}'] = away[stat].values
+            X['pace'] = (home['pace'].values + away['pace'].values) / 2
+            X['is_home'] = np.float32(1)
+
+            if feature_names is not None:
+                X = X[feature_names]
+        metrics.count('rows_processed', len(X), stage='feature_build')
+        return X
@@ -0,0 +1,100 @@
+"""Chunked columnar storage of the game history for out-of-core training.
+
+The history is split, in time order, into Parquet files of a fixed row
+count (``chunk-00000.parquet``, ``chunk-00001.parquet`` ...). Training
+streams them through ``ChunkIter``, an XGBoost ``DataIter``, so only one
+chunk is decoded at a time and XGBoost keeps its quantized pages in an
+on-disk cache. Chunk order is time order, which lets time-series CV folds
+be plain chunk ranges.
+
+    python history_chunks.py historical_games.csv data/history_chunks [--rows 1000000]
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xgboost as xgb
+from data_generator import HISTORY_DTYPES
+
+CHUNK_ROWS = 1_000_000
+
+
+def chunk_paths(directory):
+    """Chunk files in time order"""
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.startswith('chunk-') and name.endswith('.parquet')]
+
+
+def write_chunks(csv_path, directory, rows_per_chunk=CHUNK_ROWS):
+    """Split a historical games CSV into Parquet chunks without loading it whole"""
+    os.makedirs(directory, exist_ok=True)
+    for path in chunk_paths(directory):
+        os.remove(path)
+
+    n_rows = 0
+    reader = pd.read_csv(csv_path, dtype=HISTORY_DTYPES, parse_dates=['game_date'],
+                         chunksize=rows_per_chunk)
+    for i, chunk in enumerate(reader):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        pq.write_table(table, os.path.join(directory, f"chunk-{i:05d}.parquet"), compression='zstd')
+        n_rows += len(chunk)
+    return n_rows
+
+
+def chunk_columns(path):
+    """Column names stored in a chunk"""
+    return pq.read_schema(path).names
+
+
+def read_labels(path, columns):
+    """Just the label columns of one chunk"""
+    return pq.read_table(path, columns=list(columns)).to_pandas()
+
+
+def read_chunk(path, feature_names, label=None):
+    """One chunk as a float32 feature frame and (optionally) its labels"""
+    columns = list(feature_names) + ([label] if label else [])
+    df = pq.read_table(path, columns=columns).to_pandas()
+    X = df[list(feature_names)].astype(np.float32)
+    return X, (df[label].to_numpy() if label else None)
+
+
+class ChunkIter(xgb.DataIter):
+    """Feed a range of chunk files to XGBoost one at a time (labels optional)"""
+
+    def __init__(self, paths, feature_names, label, cache_dir):
+        self.paths = list(paths)
+        self.feature_names = list(feature_names)
+        self.label = label
+        self._i = 0
+        super().__init__(cache_prefix=os.path.join(cache_dir, 'xgb-cache'))
+
+    def next(self, input_data):
+        if self._i == len(self.paths):
+            return False
+        X, y = read_chunk(self.paths[self._i], self.feature_names, self.label)
+        input_data(data=X, label=y)
+        self._i += 1
+        return True
+
+    def reset(self):
+        self._i = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a historical games CSV into Parquet chunks")
+    parser.add_argument('csv_path')
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, default=CHUNK_ROWS, help="rows per chunk")
+    args = parser.parse_args()
+
+    n_rows = write_chunks(args.csv_path, args.directory, args.rows)
+    print(f"✓ Wrote {n_rows} games in {len(chunk_paths(args.directory))} chunks to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
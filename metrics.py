@@ -0,0 +1,303 @@
+"""Stage timing, counters and gauges for the betting pipeline.
+
+    import metrics
+
+    with metrics.span('parse'):
+        df = scraper.parse_odds(raw)
+    metrics.count('rows_processed', len(df), stage='parse')
+    metrics.gauge('odds_api_requests_remaining', remaining)
+    metrics.cache('prediction', hit=True)
+    metrics.observe('poll_to_alert', seconds)
+
+Collection is off until ``enable()`` is called (``config.METRICS_ENABLED``
+or the CLI ``--metrics`` flags). While disabled, ``span``, ``observe``,
+``count``, ``gauge`` and ``cache`` are bound to no-op functions, so
+instrumented code pays one attribute lookup and call per site.
+
+Spans are exported as Prometheus histograms of seconds per stage. Use
+``to_prometheus()`` / ``to_json()``, ``write(path)`` or ``serve(port)``
+for a ``/metrics`` (text) and ``/metrics.json`` endpoint. ``profile(path)``
+wraps a run in cProfile and writes a pstats dump that snakeviz, flameprof
+or gprof2dot can turn into a flame graph.
+
+Stdlib only, so cli.py can use it without slowing down startup.
+"""
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond parses
+# up to slow API fetches
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = 'betting_'
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class _Span:
+    """Context manager timing one stage into the registry"""
+
+    __slots__ = ('registry', 'key', 'start')
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry._record(self.key, time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    """Thread-safe store of span histograms, counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # key -> [bucket counts..., count, sum, max]
+            self.histograms = {}
+            self.counters = {}
+            self.gauges = {}
+            self.started_at = time.time()
+
+    def span(self, stage, **labels):
+        """Time the enclosed block as ``stage``"""
+        labels['stage'] = stage
+        return _Span(self, _key('stage_seconds', labels))
+
+    def observe(self, stage, seconds, **labels):
+        """Record a duration measured elsewhere, e.g. across threads"""
+        labels['stage'] = stage
+        self._record(_key('stage_seconds', labels), seconds)
+
+    def _record(self, key, seconds):
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(BUCKETS) + 3)
+            hist[bisect.bisect_left(BUCKETS, seconds)] += 1
+            hist[-3] += 1
+            hist[-2] += seconds
+            hist[-1] = max(hist[-1], seconds)
+
+    def count(self, name, value=1, **labels):
+        """Add ``value`` to a monotonically increasing counter"""
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """Set a gauge to its latest value"""
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def cache(self, name, hit, n=1):
+        """Record ``n`` hits or misses for cache ``name``"""
+        self.count('cache_hits' if hit else 'cache_misses', n, cache=name)
+
+    def hit_rates(self):
+        """Hit rate per cache name over everything recorded so far"""
+        hits, misses = {}, {}
+        for (name, labels), value in list(self.counters.items()):
+            if name in ('cache_hits', 'cache_misses'):
+                cache = dict(labels)['cache']
+                (hits if name == 'cache_hits' else misses)[cache] = value
+        return {cache: hits.get(cache, 0) / (hits.get(cache, 0) + misses.get(cache, 0))
+                for cache in hits.keys() | misses.keys()}
+
+    def to_dict(self):
+        """Snapshot of every metric as plain JSON-serializable data"""
+        with self._lock:
+            histograms = {key: list(hist) for key, hist in self.histograms.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+
+        spans = []
+        for (name, labels), hist in sorted(histograms.items()):
+            count, total, peak = hist[-3:]
+            spans.append({
+                'labels': dict(labels),
+                'count': count,
+                'total_seconds': total,
+                'mean_seconds': total / count if count else 0.0,
+                'max_seconds': peak,
+                'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], hist[:-3]))
+            })
+
+        return {
+            'started_at': self.started_at,
+            'uptime_seconds': time.time() - self.started_at,
+            'spans': spans,
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in sorted(counters.items())],
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                       for (name, labels), value in sorted(gauges.items())],
+            'cache_hit_rate': self.hit_rates()
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {key: list(hist) for key, hist in self.histograms.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), hist in sorted(histograms.items()):
+            metric = PREFIX + name
+            header(metric, 'histogram')
+            cumulative = 0
+            for bound, n in zip([str(b) for b in BUCKETS] + ['+Inf'], hist[:-3]):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {hist[-2]:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {hist[-3]}")
+
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{PREFIX}{name}_total"
+            header(metric, 'counter')
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            metric = PREFIX + name
+            header(metric, 'gauge')
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        for cache, rate in sorted(self.hit_rates().items()):
+            metric = PREFIX + 'cache_hit_ratio'
+            header(metric, 'gauge')
+            lines.append(f"{metric}{_format_labels([('cache', cache)])} {rate:.6f}")
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def _null_span(stage, **labels):
+    return _NULL_SPAN
+
+
+def _null_record(*args, **kwargs):
+    pass
+
+
+# Rebound by enable()/disable(); callers always go through the module
+span = _null_span
+observe = _null_record
+count = _null_record
+gauge = _null_record
+cache = _null_record
+
+
+def enable():
+    """Start recording into the module registry"""
+    global span, observe, count, gauge, cache
+    span, observe, count = registry.span, registry.observe, registry.count
+    gauge, cache = registry.gauge, registry.cache
+
+
+def disable():
+    """Switch every recording function back to a no-op"""
+    global span, observe, count, gauge, cache
+    span = _null_span
+    observe = count = gauge = cache = _null_record
+
+
+def enabled():
+    return span is not _null_span
+
+
+def to_prometheus():
+    return registry.to_prometheus()
+
+
+def to_json():
+    return registry.to_json()
+
+
+def write(path):
+    """Write metrics to ``path``; ``.json`` gets JSON, anything else Prometheus text"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(to_json() if path.endswith('.json') else to_prometheus())
+    return path
+
+
+def serve(port=9108, host='127.0.0.1'):
+    """Expose ``/metrics`` and ``/metrics.json`` from a background thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body, content_type = to_json(), 'application/json'
+            elif self.path.startswith('/metrics'):
+                body, content_type = to_prometheus(), 'text/plain; version=0.0.4'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header('content-type', content_type)
+            self.send_header('content-length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+@contextlib.contextmanager
+def profile(path):
+    """Run the enclosed block under cProfile and dump pstats to ``path``"""
+    import cProfile
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
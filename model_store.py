@@ -0,0 +1,126 @@
+import joblib
+import os
+import threading
+from collections import OrderedDict
+from settings import config
+from registry import MARKETS
+import metrics
+
+MODEL_DIR = 'models'
+DEFAULT_MODEL_PATH = os.path.join(MODEL_DIR, 'betting_model.pkl')
+
+
+def model_path(sport=None, market='h2h', model_dir=MODEL_DIR):
+    """Where the model for (sport, market) lives; no sport means the default model"""
+    if sport is None:
+        name = 'betting_model.pkl' if market == 'h2h' else f'betting_model_{market}.pkl'
+        return os.path.join(model_dir, name)
+    return os.path.join(model_dir, sport, f'{market}.pkl')
+
+
+class ModelStore:
+    """Per-sport, per-market models loaded on first use.
+
+    ``get(sport, market)`` resolves ``models/<sport>/<market>.pkl`` and
+    loads it only when first asked for. Sports listed in
+    ``default_sports`` (``config.DEFAULT_MODEL_SPORTS``, the sports the
+    default models were trained on) fall back to the market's default
+    (``models/betting_model.pkl`` for moneylines,
+    ``models/betting_model_<market>.pkl`` otherwise); any other sport
+    without its own model has none. Loaded models sit in an LRU cache
+    bounded by ``budget_mb`` (pickle size on disk is the estimate of a
+    model's footprint); the least recently used are evicted when a new
+    load would go over budget. A model file that changed on disk is
+    reloaded on its next use.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, budget_mb=None, default_sports=None):
+        self.model_dir = model_dir
+        if default_sports is None:
+            default_sports = config.DEFAULT_MODEL_SPORTS
+        self.default_sports = set(default_sports)
+        self.budget = (budget_mb or config.MODEL_CACHE_MB) * 1024 * 1024
+        self.size = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, sport=None, market='h2h'):
+        """Path of the model serving (sport, market), or None"""
+        path = model_path(sport, market, self.model_dir)
+        if os.path.exists(path):
+            return path
+        if sport is not None and sport not in self.default_sports:
+            return None
+        default = model_path(None, market, self.model_dir)
+        if os.path.exists(default):
+            return default
+        return None
+
+    def available(self):
+        """(sport, market) keys of every model on disk; sport None is the default"""
+        keys = [(None, market) for market in MARKETS
+                if os.path.exists(model_path(None, market, self.model_dir))]
+        if os.path.isdir(self.model_dir):
+            for sport in sorted(os.listdir(self.model_dir)):
+                sport_dir = os.path.join(self.model_dir, sport)
+                if os.path.isdir(sport_dir):
+                    keys += [(sport, name[:-4]) for name in sorted(os.listdir(sport_dir))
+                             if name.endswith('.pkl')]
+        return keys
+
+    def get(self, sport=None, market='h2h'):
+        """Loaded model entry for (sport, market), or None if there is no model.
+
+        The entry is a dict with ``model``, ``feature_names``,
+        ``model_version`` and ``path``. Sports sharing the default model
+        share one cached copy.
+        """
+        path = self.resolve(sport, market)
+        if path is None:
+            return None
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is not None and entry['mtime'] == mtime:
+                self._cache.move_to_end(path)
+                metrics.cache('model', hit=True)
+                return entry
+            metrics.cache('model', hit=False)
+
+        with metrics.span('model_load', sport=sport or 'default', market=market):
+            data = joblib.load(path)
+        entry = {
+            'model': data['model'],
+            'feature_names': data['feature_names'],
+            # Models saved before versioning fall back to the file's mtime
+            'model_version': data.get('model_version') or str(int(mtime)),
+            'path': path,
+            'mtime': mtime,
+            'size': os.path.getsize(path)
+        }
+
+        with self._lock:
+            old = self._cache.pop(path, None)
+            if old is not None:
+                self.size -= old['size']
+            # Keep the new model even if it alone is over budget
+            while self._cache and self.size + entry['size'] > self.budget:
+                _, evicted = self._cache.popitem(last=False)
+                self.size -= evicted['size']
+                metrics.count('model_evictions')
+            self._cache[path] = entry
+            self.size += entry['size']
+            metrics.gauge('model_cache_bytes', self.size)
+            metrics.gauge('models_loaded', len(self._cache))
+        return entry
+
+    def loaded(self):
+        """Paths currently held, least recently used first"""
+        with self._lock:
+            return list(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.size = 0
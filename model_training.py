@@ -4,115 +4,230 @@ import xgboost as xgb
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import log_loss, accuracy_score, roc_auc_score
 import joblib
+from datetime import datetime
 import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config
+import tempfile
+from settings import config
+from data_generator import read_history
+from model_store import model_path
+import metrics
+
+FEATURE_COLUMNS = [
+    'home_ppg', 'away_ppg',
+    'home_def_rating', 'away_def_rating',
+    'home_form_l10', 'away_form_l10',
+    'home_rest_days', 'away_rest_days',
+    'home_injury_impact', 'away_injury_impact',
+    'pace',
+    'home_3pt_pct', 'away_3pt_pct',
+    'is_home'
+]
+
+# Closing lines of the spread and total markets, features for every market
+LINE_COLUMNS = ['spread_line', 'total_line']
+
+# Label column of each market's model; all share one feature matrix
+TARGETS = {'h2h': 'home_win', 'spreads': 'home_cover', 'totals': 'over'}
+
+# Model parameters
+PARAMS = {
+    'max_depth': 6,
+    'learning_rate': 0.05,
+    'n_estimators': 200,
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'random_state': 42,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8
+}
+
+def booster_params(params=PARAMS):
+    """PARAMS in xgb.train form: (params dict, number of boosting rounds)"""
+    native = {k: v for k, v in params.items() if k not in ('n_estimators', 'learning_rate', 'random_state')}
+    native.update(eta=params['learning_rate'], seed=params['random_state'], tree_method='hist')
+    return native, params['n_estimators']
+
+def fit_target(dtrain, label, market):
+    """Train one market's booster on a shared quantized matrix"""
+    params, rounds = booster_params()
+    dtrain.set_label(label)
+    with metrics.span('train', market=market):
+        return xgb.train(params, dtrain, num_boost_round=rounds)
+
+def to_classifier(booster):
+    """Wrap a trained booster in the XGBClassifier interface saved models use"""
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('ubj')))
+    return model
+
+def evaluate(y, y_pred_proba):
+    """Log loss, accuracy and AUC of predicted probabilities"""
+    return (log_loss(y, y_pred_proba, labels=[0, 1]),
+            accuracy_score(y, y_pred_proba > 0.5),
+            roc_auc_score(y, y_pred_proba))
+
+def format_scores(ll, acc, auc):
+    return f"Log Loss={ll:.4f}, Accuracy={acc:.4f}, AUC={auc:.4f}"
+
+def print_cv(cv):
+    """Average CV scores per market"""
+    for market, folds in cv.items():
+        ll, acc, auc = np.mean(folds, axis=0)
+        print(f"\n{market} average CV Log Loss: {ll:.4f}")
+        print(f"{market} average CV Accuracy: {acc:.4f} ({acc*100:.1f}%)")
+        print(f"{market} average CV AUC: {auc:.4f}")
 
 class BettingModel:
     def __init__(self):
         self.model = None
+        self.models = {}
         self.feature_names = None
+        self.model_version = None
         
-    def load_data(self):
-        """Load historical game data"""
+    def load_data(self, path=None):
+        """Load historical game data: features plus a label column per market"""
         print("\n1. Loading training data...")
+        path = path or config.HISTORICAL_DATA_PATH
         
-        if not os.path.exists(config.HISTORICAL_DATA_PATH):
-            print(f"✗ Training data not found at {config.HISTORICAL_DATA_PATH}")
+        if not os.path.exists(path):
+            print(f"✗ Training data not found at {path}")
             print("Run 'python src/data_generator.py' first")
             return None, None
         
-        df = pd.read_csv(config.HISTORICAL_DATA_PATH)
+        # Define features; histories without closing lines train moneyline only
+        header = pd.read_csv(path, nrows=0).columns
+        feature_columns = FEATURE_COLUMNS + [c for c in LINE_COLUMNS if c in header]
+        targets = {market: column for market, column in TARGETS.items() if column in header}
+        
+        with metrics.span('read_history'):
+            df = read_history(path, columns=feature_columns + list(targets.values()))
         print(f"✓ Loaded {len(df)} games")
+        metrics.count('rows_processed', len(df), stage='read_history')
         
-        # Define features
-        feature_columns = [
-            'home_ppg', 'away_ppg',
-            'home_def_rating', 'away_def_rating',
-            'home_form_l10', 'away_form_l10',
-            'home_rest_days', 'away_rest_days',
-            'home_injury_impact', 'away_injury_impact',
-            'pace',
-            'home_3pt_pct', 'away_3pt_pct',
-            'is_home'
-        ]
-        
-        X = df[feature_columns]
-        y = df['home_win']
+        # One float32 block, the precision XGBoost trains in anyway
+        with metrics.span('feature_build'):
+            X = df[feature_columns].astype(np.float32)
+            y = pd.DataFrame({market: df[column] for market, column in targets.items()})
         
         self.feature_names = feature_columns
         
         return X, y
     
     def train(self, X, y):
-        """Train XGBoost model with time-series cross-validation"""
-        print("\n2. Training model...")
+        """Train one XGBoost model per market with time-series cross-validation.
+
+        ``y`` has a label column per market (a Series is the moneyline).
+        Each fold's training rows are quantized once into a QuantileDMatrix
+        that every market's model trains on; only the labels change.
+        Returns the average CV accuracy per market.
+        """
+        print("\n2. Training models...")
+        labels = y.to_frame('h2h') if isinstance(y, pd.Series) else y
+        self.feature_names = list(X.columns)
         
         # Time series split
         tscv = TimeSeriesSplit(n_splits=5)
         
-        # Model parameters
-        params = {
-            'max_depth': 6,
-            'learning_rate': 0.05,
-            'n_estimators': 200,
-            'objective': 'binary:logistic',
-            'eval_metric': 'logloss',
-            'random_state': 42,
-            'subsample': 0.8,
-            'colsample_bytree': 0.8
-        }
-        
-        # Cross-validation scores
-        cv_scores = []
-        cv_acc = []
-        cv_auc = []
-        
-        print("\nPerforming 5-fold time-series cross-validation...")
+        # Cross-validation (log loss, accuracy, AUC) per market
+        cv = {market: [] for market in labels}
+        
+        print(f"\nPerforming 5-fold time-series cross-validation ({', '.join(labels)})...")
         
         for fold, (train_idx, val_idx) in enumerate(tscv.split(X), 1):
-            X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-            y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
+            X_val = X.iloc[val_idx]
+            dtrain = xgb.QuantileDMatrix(X.iloc[train_idx], max_bin=256)
             
-            model = xgb.XGBClassifier(**params)
-            model.fit(X_train, y_train, verbose=False)
-            
-            # Predictions
-            y_pred_proba = model.predict_proba(X_val)[:, 1]
-            y_pred = model.predict(X_val)
-            
-            # Metrics
-            ll = log_loss(y_val, y_pred_proba)
-            acc = accuracy_score(y_val, y_pred)
-            auc = roc_auc_score(y_val, y_pred_proba)
-            
-            cv_scores.append(ll)
-            cv_acc.append(acc)
-            cv_auc.append(auc)
+            for market, label in labels.items():
+                booster = fit_target(dtrain, label.iloc[train_idx], market)
+                y_pred_proba = booster.inplace_predict(X_val)
+                cv[market].append(evaluate(label.iloc[val_idx], y_pred_proba))
+                print(f"  Fold {fold} {market:8s}: " + format_scores(*cv[market][-1]))
+        
+        print_cv(cv)
+        
+        # Train final models on all data, again on one quantized matrix
+        print("\n3. Training final models on full dataset...")
+        dtrain = xgb.QuantileDMatrix(X, max_bin=256)
+        for market, label in labels.items():
+            booster = fit_target(dtrain, label, market)
+            self.models[market] = to_classifier(booster)
             
-            print(f"  Fold {fold}: Log Loss={ll:.4f}, Accuracy={acc:.4f}, AUC={auc:.4f}")
+            # Final evaluation
+            _, final_acc, final_auc = evaluate(label, booster.inplace_predict(X))
+            print(f"✓ Final {market} model accuracy: {final_acc:.4f} ({final_acc*100:.1f}%), "
+                  f"AUC: {final_auc:.4f}")
+        self.model = self.models.get('h2h')
+        
+        return {market: np.mean([scores[1] for scores in folds]) for market, folds in cv.items()}
+    
+    def train_chunks(self, chunk_dir, n_splits=5, cache_dir=None):
+        """Train out of core on a directory of time-ordered history chunks.
+
+        Chunks stream through XGBoost's external-memory interface, so peak
+        memory is about one decoded chunk plus the boosters, whatever the
+        history size. CV folds are expanding chunk ranges (TimeSeriesSplit
+        over chunk numbers) and validation is scored chunk by chunk. As in
+        ``train``, each fold is quantized once for all markets.
+        """
+        from history_chunks import ChunkIter, chunk_columns, chunk_paths, read_chunk, read_labels
         
-        print(f"\nAverage CV Log Loss: {np.mean(cv_scores):.4f}")
-        print(f"Average CV Accuracy: {np.mean(cv_acc):.4f} ({np.mean(cv_acc)*100:.1f}%)")
-        print(f"Average CV AUC: {np.mean(cv_auc):.4f}")
+        print("\n2. Training models out of core...")
+        paths = chunk_paths(chunk_dir)
+        if len(paths) <= n_splits:
+            print(f"✗ Need more than {n_splits} chunks in {chunk_dir}, found {len(paths)}")
+            return None
         
-        # Train final model on all data
-        print("\n3. Training final model on full dataset...")
-        self.model = xgb.XGBClassifier(**params)
-        self.model.fit(X, y, verbose=False)
+        columns = chunk_columns(paths[0])
+        self.feature_names = FEATURE_COLUMNS + [c for c in LINE_COLUMNS if c in columns]
+        targets = {market: column for market, column in TARGETS.items() if column in columns}
+        # Labels are a few bytes a game, so they are held for every chunk
+        labels = [read_labels(path, targets.values()).set_axis(list(targets), axis=1)
+                  for path in paths]
         
-        # Final evaluation
-        final_pred_proba = self.model.predict_proba(X)[:, 1]
-        final_pred = self.model.predict(X)
+        def quantize(chunks, cache):
+            with metrics.span('quantize'):
+                return xgb.ExtMemQuantileDMatrix(
+                    ChunkIter([paths[i] for i in chunks], self.feature_names, None, cache), max_bin=256
+                )
         
-        final_acc = accuracy_score(y, final_pred)
-        final_auc = roc_auc_score(y, final_pred_proba)
+        cv = {market: [] for market in targets}
         
-        print(f"✓ Final model accuracy: {final_acc:.4f} ({final_acc*100:.1f}%)")
-        print(f"✓ Final model AUC: {final_auc:.4f}")
+        print(f"\nPerforming {n_splits}-fold time-series cross-validation over {len(paths)} chunks "
+              f"({', '.join(targets)})...")
         
-        return np.mean(cv_acc)
+        with tempfile.TemporaryDirectory(dir=cache_dir) as cache:
+            folds = TimeSeriesSplit(n_splits=n_splits).split(np.arange(len(paths)))
+            for fold, (train_chunks, val_chunks) in enumerate(folds, 1):
+                dtrain = quantize(train_chunks, cache)
+                y_train = pd.concat([labels[i] for i in train_chunks], ignore_index=True)
+                boosters = {market: fit_target(dtrain, y_train[market], market) for market in targets}
+                del dtrain
+                
+                # Score validation chunks one at a time
+                y_pred_proba = {market: [] for market in targets}
+                for i in val_chunks:
+                    X_chunk, _ = read_chunk(paths[i], self.feature_names)
+                    for market, booster in boosters.items():
+                        y_pred_proba[market].append(booster.inplace_predict(X_chunk))
+                y_val = pd.concat([labels[i] for i in val_chunks], ignore_index=True)
+                
+                for market in targets:
+                    cv[market].append(evaluate(y_val[market], np.concatenate(y_pred_proba[market])))
+                    print(f"  Fold {fold} {market:8s} (chunks {train_chunks[0]}-{train_chunks[-1]} -> "
+                          f"{val_chunks[0]}-{val_chunks[-1]}): " + format_scores(*cv[market][-1]))
+            
+            print_cv(cv)
+            
+            # Train final models on all chunks
+            print("\n3. Training final models on all chunks...")
+            dtrain = quantize(range(len(paths)), cache)
+            y_all = pd.concat(labels, ignore_index=True)
+            for market in targets:
+                self.models[market] = to_classifier(fit_target(dtrain, y_all[market], market))
+            del dtrain
+        self.model = self.models.get('h2h')
+        
+        return {market: np.mean([scores[1] for scores in folds]) for market, folds in cv.items()}
     
     def get_feature_importance(self):
         """Get feature importance"""
@@ -127,31 +242,39 @@ class BettingModel:
         
         return df
     
-    def save_model(self):
-        """Save trained model"""
-        os.makedirs('models', exist_ok=True)
-        model_path = 'models/betting_model.pkl'
-        
-        joblib.dump({
-            'model': self.model,
-            'feature_names': self.feature_names
-        }, model_path)
+    def save_model(self, sport=None, market=None):
+        """Save trained models (every market, or one), as the defaults or as one sport's"""
+        models = self.models or {'h2h': self.model}
+        if market is not None:
+            models = {market: models[market]}
         
-        print(f"\n✓ Model saved to: {model_path}")
+        self.model_version = datetime.now().strftime('%Y%m%d%H%M%S')
+        for market, model in models.items():
+            path = model_path(sport, market)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            joblib.dump({
+                'model': model,
+                'feature_names': self.feature_names,
+                'model_version': self.model_version
+            }, path)
+            
+            print(f"\n✓ {market} model saved to: {path}")
     
-    def load_model(self):
+    def load_model(self, sport=None, market='h2h'):
         """Load trained model"""
-        model_path = 'models/betting_model.pkl'
+        path = model_path(sport, market)
         
-        if not os.path.exists(model_path):
-            print(f"✗ Model not found at {model_path}")
+        if not os.path.exists(path):
+            print(f"✗ Model not found at {path}")
             return False
         
-        data = joblib.load(model_path)
-        self.model = data['model']
+        with metrics.span('model_load'):
+            data = joblib.load(path)
+        self.model = self.models[market] = data['model']
         self.feature_names = data['feature_names']
+        self.model_version = data.get('model_version')
         
-        print(f"✓ Model loaded from: {model_path}")
+        print(f"✓ Model loaded from: {path}")
         return True
     
     def predict(self, features):
@@ -159,41 +282,70 @@ class BettingModel:
         if self.model is None:
             raise ValueError("Model not trained or loaded")
         
-        prob = self.model.predict_proba(features)[0, 1]
+        with metrics.span('inference'):
+            prob = self.model.predict_proba(features)[0, 1]
+        metrics.count('rows_processed', 1, stage='inference')
         return prob
+    
+    def predict_batch(self, features):
+        """Home win probability for every row of ``features``"""
+        if self.model is None:
+            raise ValueError("Model not trained or loaded")
+        
+        with metrics.span('inference'):
+            probs = self.model.predict_proba(features)[:, 1]
+        metrics.count('rows_processed', len(probs), stage='inference')
+        return probs
 
-def main():
-    """Main training pipeline"""
+def main(sport=None, data_path=None, chunk_dir=None, chunk_rows=None):
+    """Main training pipeline; with ``chunk_dir`` the history is streamed from Parquet chunks"""
     
     print("SPORTS BETTING MODEL TRAINING")
     
     
     model = BettingModel()
     
-    # Load data
-    X, y = model.load_data()
+    if chunk_dir:
+        from history_chunks import CHUNK_ROWS, chunk_paths, write_chunks
+        if not chunk_paths(chunk_dir):
+            data_path = data_path or config.HISTORICAL_DATA_PATH
+            print(f"\n1. Splitting {data_path} into chunks in {chunk_dir}...")
+            if not os.path.exists(data_path):
+                print(f"✗ Training data not found at {data_path}")
+                print("Run 'python src/data_generator.py' first")
+                return
+            n_rows = write_chunks(data_path, chunk_dir, chunk_rows or CHUNK_ROWS)
+            print(f"✓ Wrote {n_rows} games in {len(chunk_paths(chunk_dir))} chunks")
+        cv_accuracy = model.train_chunks(chunk_dir)
+    else:
+        # Load data
+        X, y = model.load_data(data_path)
+        
+        if X is None:
+            return
+        
+        # Train model
+        cv_accuracy = model.train(X, y)
     
-    if X is None:
+    if cv_accuracy is None:
         return
     
-    # Train model
-    cv_accuracy = model.train(X, y)
-    
     # Feature importance
-    print("\n4. Feature importance:")
+    print("\n4. Feature importance (moneyline model):")
     print("=" * 60)
     importance_df = model.get_feature_importance()
     for idx, row in importance_df.iterrows():
         print(f"  {row['feature']:25s}: {row['importance']:.4f}")
     
-    # Save model
-    print("\n5. Saving model...")
-    model.save_model()
+    # Save models
+    print("\n5. Saving models...")
+    model.save_model(sport)
     
     
     print("✓ TRAINING COMPLETE!")
     
-    print(f"Model accuracy: {cv_accuracy*100:.1f}%")
+    for market, accuracy in cv_accuracy.items():
+        print(f"{market} model accuracy: {accuracy*100:.1f}%")
     
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+from settings import config
+from odds_store import OddsStore, format_commence
+
+ARCHIVE_PATH = config.ODDS_ARCHIVE_PATH
+
+HISTORY_COLUMNS = [
+    'game_id', 'sport', 'commence_time', 'home_team', 'away_team',
+    'book', 'market', 'outcome', 'price', 'point', 'fetch_timestamp'
+]
+
+ARCHIVE_SCHEMA = pa.schema([
+    ('game_id', pa.string()),
+    ('commence_time', pa.string()),
+    ('home_team', pa.dictionary(pa.int16(), pa.string())),
+    ('away_team', pa.dictionary(pa.int16(), pa.string())),
+    ('book', pa.dictionary(pa.int16(), pa.string())),
+    ('market', pa.dictionary(pa.int8(), pa.string())),
+    ('outcome', pa.dictionary(pa.int8(), pa.string())),
+    ('price', pa.float64()),
+    ('point', pa.float64()),
+    ('fetch_timestamp', pa.timestamp('us')),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('sport', pa.string()), ('date', pa.string())]), flavor='hive'
+)
+
+
+class OddsArchive:
+    """Two-tier odds history: recent games in SQLite, settled games in Parquet.
+
+    Cold files live under ``sport=<key>/date=<YYYY-MM-DD>/`` (date of
+    ``commence_time``) so scans can skip whole partitions.
+    """
+
+    def __init__(self, store=None, archive_path=None):
+        self.store = store or OddsStore()
+        self.archive_path = archive_path or ARCHIVE_PATH
+
+    def compact(self, older_than_days=30, now=None):
+        """Move odds for games that started more than N days ago to the archive.
+
+        Safe to rerun after a failure: games already in the archive are
+        not written again, only dropped from SQLite.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = format_commence(now - timedelta(days=older_than_days))
+
+        if not os.path.exists(self.store.db_path):
+            return 0
+
+        conn = self.store.connect()
+        try:
+            games = pd.read_sql_query(
+                "SELECT game_id, sport, commence_time FROM games WHERE commence_time < ?",
+                conn, params=[cutoff]
+            )
+            if games.empty:
+                return 0
+
+            conn.execute("CREATE TEMP TABLE cold_games (game_id TEXT PRIMARY KEY)")
+            conn.executemany("INSERT INTO cold_games VALUES (?)",
+                             ((g,) for g in games['game_id']))
+
+            df = pd.read_sql_query("""
+                SELECT p.game_id, g.sport, g.commence_time, g.home_team, g.away_team,
+                       p.book, p.market, p.outcome, c.price, c.point, s.fetch_timestamp
+                FROM cold_games
+                JOIN games g USING (game_id)
+                JOIN prices p USING (game_id)
+                JOIN odds_changes c ON c.price_id = p.price_id
+                JOIN snapshots s ON s.snapshot_id = c.snapshot_id
+            """, conn)
+
+            # A run that stopped between writing and deleting left these
+            # games in both tiers
+            archived = self.read_cold(start=games['commence_time'].min(),
+                                      end=games['commence_time'].max(),
+                                      sports=list(games['sport'].dropna().unique()),
+                                      columns=['game_id'], game_ids=games['game_id'])
+            df = df[~df['game_id'].isin(archived['game_id'])]
+            self._write_partitions(df)
+
+            # Only drop hot rows once the cold copy is on disk
+            cold_prices = "SELECT price_id FROM prices WHERE game_id IN (SELECT game_id FROM cold_games)"
+            for table in ('odds_changes', 'odds_latest'):
+                conn.execute(f"DELETE FROM {table} WHERE price_id IN ({cold_prices})")
+            for table in ('prices', 'games'):
+                conn.execute(f"DELETE FROM {table} WHERE game_id IN (SELECT game_id FROM cold_games)")
+            conn.commit()
+        finally:
+            conn.close()
+
+        print(f"✓ Archived {len(df)} odds rows for {len(games)} games")
+        return len(df)
+
+    def _write_partitions(self, df):
+        """Append rows to the per sport/date Parquet partitions"""
+        if df.empty:
+            return
+
+        df = df.copy()
+        df['fetch_timestamp'] = pd.to_datetime(df['fetch_timestamp'])
+        df['date'] = df['commence_time'].str.slice(0, 10)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+
+        for (sport, date), part in df.groupby(['sport', 'date'], sort=False):
+            part_dir = os.path.join(self.archive_path, f"sport={sport}", f"date={date}")
+            os.makedirs(part_dir, exist_ok=True)
+
+            part = part.sort_values(['game_id', 'book', 'market', 'outcome', 'fetch_timestamp'])
+            table = pa.Table.from_pandas(
+                part[ARCHIVE_SCHEMA.names], schema=ARCHIVE_SCHEMA, preserve_index=False
+            )
+            # Written under a hidden name (ignored by dataset scans) and
+            # renamed, so a partial file is never read
+            tmp_path = os.path.join(part_dir, f".part-{stamp}.parquet")
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, os.path.join(part_dir, f"part-{stamp}.parquet"))
+
+    def read_cold(self, start=None, end=None, sports=None, columns=None, game_ids=None):
+        """Scan archived odds, pruning partitions by sport and commence date"""
+        if not os.path.isdir(self.archive_path):
+            return pd.DataFrame(columns=columns or HISTORY_COLUMNS)
+
+        dataset = ds.dataset(self.archive_path, format='parquet',
+                             partitioning=PARTITIONING, schema=_dataset_schema())
+
+        filters = []
+        if start is not None:
+            filters.append(ds.field('date') >= _date(start))
+        if end is not None:
+            filters.append(ds.field('date') <= _date(end))
+        if sports:
+            filters.append(ds.field('sport').isin(list(sports)))
+        if game_ids is not None:
+            filters.append(ds.field('game_id').isin(list(game_ids)))
+
+        expression = None
+        for f in filters:
+            expression = f if expression is None else expression & f
+
+        df = dataset.to_table(columns=columns or HISTORY_COLUMNS, filter=expression).to_pandas()
+        for column in ('home_team', 'away_team', 'book', 'market', 'outcome'):
+            if column in df and isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(str)
+        return df
+
+    def read_hot(self, start=None, end=None, sports=None, columns=None, game_ids=None):
+        """Read change rows still held in SQLite with the same filters"""
+        if not os.path.exists(self.store.db_path):
+            return pd.DataFrame(columns=columns or HISTORY_COLUMNS)
+
+        query = """
+            SELECT p.game_id, g.sport, g.commence_time, g.home_team, g.away_team,
+                   p.book, p.market, p.outcome, c.price, c.point, s.fetch_timestamp
+            FROM games g
+            JOIN prices p USING (game_id)
+            JOIN odds_changes c ON c.price_id = p.price_id
+            JOIN snapshots s ON s.snapshot_id = c.snapshot_id
+            WHERE 1 = 1
+        """
+        params = []
+        if start is not None:
+            query += " AND substr(g.commence_time, 1, 10) >= ?"
+            params.append(_date(start))
+        if end is not None:
+            query += " AND substr(g.commence_time, 1, 10) <= ?"
+            params.append(_date(end))
+        if sports:
+            query += f" AND g.sport IN ({','.join('?' * len(sports))})"
+            params.extend(sports)
+
+        conn = self.store.connect()
+        try:
+            if game_ids is not None:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_games (game_id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM lookup_games")
+                conn.executemany("INSERT OR IGNORE INTO lookup_games VALUES (?)",
+                                 ((str(g),) for g in game_ids))
+                query += " AND g.game_id IN (SELECT game_id FROM lookup_games)"
+            df = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+
+        df['fetch_timestamp'] = pd.to_datetime(df['fetch_timestamp'])
+        return df[columns] if columns else df
+
+    def read_history(self, start=None, end=None, sports=None, columns=None, game_ids=None):
+        """Read odds history across the hot and cold tiers.
+
+        ``start``/``end`` bound the game's commence date (inclusive),
+        ``sports`` restricts to a list of sport keys and ``game_ids`` to
+        specific games.
+        """
+        cold = self.read_cold(start, end, sports, columns, game_ids)
+        hot = self.read_hot(start, end, sports, columns, game_ids)
+        frames = [df for df in (cold, hot) if not df.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns or HISTORY_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+
+def _dataset_schema():
+    """File schema plus the hive partition columns"""
+    return ARCHIVE_SCHEMA.append(pa.field('sport', pa.string())).append(pa.field('date', pa.string()))
+
+
+def _date(value):
+    """Normalize a date-like value to the partition's YYYY-MM-DD form"""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def main():
+    """Archive settled games"""
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+    print("ODDS HISTORY COMPACTION")
+    print(f"\nArchiving games older than {days} days...")
+    OddsArchive().compact(older_than_days=days)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""Synthetic intraday odds tick streams for load testing.
+
+``OddsTickGenerator`` simulates a slate of games quoted by dozens of books
+over a day of polls, vectorized across every game and book at once:
+
+- each game's fair home win probability, spread and total follow random
+  walks; the moneyline and spread move together and totals loosely with
+  them
+- steam moves: occasional sharp jumps in a game's side or total
+- books see the fair numbers through their own lag and shading, re-quote
+  at their own rate and charge their own, drifting, vig
+- spreads and totals sit on the half point with the juice shaded toward
+  the fair number
+
+Each poll comes out as a full board in the long format ``parse_odds``
+produces (``boards``), as only the prices that changed (``ticks``) or as
+an Odds-API-shaped JSON body (``payloads``). From the command line:
+
+    python odds_generator.py ticks [--games 5000 --books 40 --polls 300] [--out ticks.parquet]
+    python odds_generator.py store data/load_odds.db [--games 1000 --polls 300]
+    python odds_generator.py replay data/recordings/synthetic [--games 50 --polls 100]
+
+``replay`` writes recordings that ``odds_replay.py serve`` can play back.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from odds_math import prob_to_american
+import registry
+
+# Real book keys first, then numbered ones
+BOOK_KEYS = [
+    'pinnacle', 'circasports', 'draftkings', 'fanduel', 'betmgm', 'williamhill_us', 'espnbet',
+    'fanatics', 'betrivers', 'pointsbetus', 'hardrockbet', 'ballybet', 'betparx', 'wynnbet',
+    'unibet_us', 'superbook', 'twinspires', 'windcreek', 'sisportsbook', 'tipico_us', 'betfred_us',
+    'betonlineag', 'bovada', 'mybookieag', 'lowvig', 'betus', 'fliff', 'betanysports'
+]
+# Books that move first and never lag
+SHARP_BOOKS = 2
+
+# Slots per (game, book), in parse_odds order
+SLOT_MARKETS = np.array([0, 0, 1, 1, 2, 2], dtype=np.int8)
+SLOT_OUTCOMES = np.array([0, 1, 0, 1, 2, 3], dtype=np.int8)
+
+# Spread points per unit of home win log-odds
+POINTS_PER_LOGIT = 6.5
+# Cover (or over) probability gained per point off the fair number
+COVER_PER_POINT = 0.03
+
+API_TIME = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def book_keys(n_books):
+    """API keys for ``n_books`` books"""
+    return BOOK_KEYS[:n_books] + [f'book_{i:02d}' for i in range(len(BOOK_KEYS), n_books)]
+
+
+class OddsTickGenerator:
+    """Simulated odds for ``n_games`` x ``n_books`` over ``n_polls`` polls.
+
+    Every iteration (``polls``, ``boards``, ``ticks``, ``payloads``)
+    replays the same stream from ``seed``. Prices are integer American
+    odds; the first poll is the opening board, later ones change only
+    where a book re-quoted at a new number.
+    """
+
+    def __init__(self, n_games=1000, n_books=40, n_polls=288, poll_seconds=60,
+                 sport='basketball_nba', start=None, seed=0, steam_rate=0.002, max_lag=10):
+        self.n_games = n_games
+        self.n_books = n_books
+        self.n_polls = n_polls
+        self.poll_seconds = poll_seconds
+        self.sport = sport
+        self.start = start or datetime(2026, 1, 1, 12)
+        self.seed = seed
+        self.steam_rate = steam_rate
+        self.max_lag = max_lag
+
+        teams = registry.NBA_TEAMS
+        g = range(n_games)
+        # Away is never the home team
+        self.home_teams = [teams[i % len(teams)] for i in g]
+        self.away_teams = [teams[(i + 1 + (i // len(teams)) % (len(teams) - 1)) % len(teams)] for i in g]
+        self.game_ids = [f'synthetic{seed:04d}{i:08d}' for i in g]
+        # Games tip off in half-hour waves after the last poll
+        first_game = self.start + timedelta(seconds=n_polls * poll_seconds)
+        self.commence_times = [(first_game + timedelta(minutes=30 * (i % 12))).strftime(API_TIME) for i in g]
+        self.books = book_keys(n_books)
+        self._board = None
+
+    @property
+    def n_prices(self):
+        return self.n_games * self.n_books * len(SLOT_MARKETS)
+
+    def timestamp(self, poll):
+        return self.start + timedelta(seconds=poll * self.poll_seconds)
+
+    def polls(self):
+        """Yield ``(poll, prices, points, changed)`` per poll.
+
+        Arrays are shaped (games, books, 6) in parse_odds slot order: home
+        and away moneyline, home and away spread, over and under. They are
+        updated in place, so copy them to keep a poll.
+        """
+        G, B = self.n_games, self.n_books
+        rng = np.random.default_rng(self.seed)
+
+        # Fair numbers per game
+        side = rng.normal(0.25, 0.8, G)
+        basis = np.zeros(G)
+        total = rng.normal(224, 8, G)
+
+        # Per book: lag in polls, re-quote rate, smallest price move, vig,
+        # and a shade per game
+        lag = np.minimum(rng.geometric(0.4, B) - 1, self.max_lag)
+        lag[:SHARP_BOOKS] = 0
+        refresh = rng.uniform(0.2, 0.8, B)
+        refresh[:SHARP_BOOKS] = 1.0
+        step = rng.integers(3, 8, B).astype(np.float32)
+        step[:SHARP_BOOKS] = 1
+        vig = rng.uniform(0.035, 0.07, B)
+        vig[:SHARP_BOOKS] = rng.uniform(0.015, 0.025, min(B, SHARP_BOOKS))
+        shade_side = rng.normal(0, 0.03, (G, B))
+        shade_points = rng.normal(0, 0.25, (G, B))
+
+        # Ring of recent fair numbers so each book can quote from its lag
+        ring = self.max_lag + 1
+        fair_side = np.empty((ring, G))
+        fair_spread = np.empty((ring, G))
+        fair_total = np.empty((ring, G))
+
+        prices = np.zeros((G, B, 6), dtype=np.float32)
+        points = np.full((G, B, 6), np.nan, dtype=np.float32)
+
+        for poll in range(self.n_polls):
+            if poll:
+                # Correlated moves: totals drift partly with the side
+                z_side, z_total = rng.standard_normal((2, G))
+                side += 0.005 * z_side
+                basis += 0.02 * rng.standard_normal(G)
+                total += 0.05 * (0.2 * z_side + 0.98 * z_total)
+
+                # Steam: a sharp jump in the side or the total
+                steam = np.flatnonzero(rng.random(G) < self.steam_rate)
+                direction = rng.choice([-1.0, 1.0], len(steam))
+                on_total = rng.random(len(steam)) < 0.4
+                side[steam[~on_total]] += direction[~on_total] * rng.normal(0.25, 0.08, (~on_total).sum())
+                total[steam[on_total]] += direction[on_total] * rng.normal(2.5, 0.8, on_total.sum())
+
+                # Now and then a book reprices its whole board
+                repriced = rng.random(B) < 0.02
+                vig[repriced] = np.clip(vig[repriced] * np.exp(rng.normal(0, 0.1, repriced.sum())), 0.01, 0.10)
+
+            slot = poll % ring
+            fair_side[slot] = side
+            fair_spread[slot] = -POINTS_PER_LOGIT * side + basis
+            fair_total[slot] = total
+            # Until a book's lag has elapsed it quotes the opening numbers
+            seen = (poll - np.minimum(lag, poll)) % ring
+
+            view_side = fair_side[seen].T + shade_side
+            view_spread = fair_spread[seen].T + shade_points
+            view_total = fair_total[seen].T + shade_points
+
+            margin = 1 + vig
+            p_home = 1 / (1 + np.exp(-view_side))
+            spread_line = np.floor(view_spread) + 0.5
+            p_cover = 0.5 + COVER_PER_POINT * (spread_line - view_spread)
+            total_line = np.floor(view_total) + 0.5
+            p_over = 0.5 + COVER_PER_POINT * (view_total - total_line)
+
+            implied = np.stack([p_home, 1 - p_home, p_cover, 1 - p_cover, p_over, 1 - p_over], axis=-1)
+            new_prices = np.rint(prob_to_american(np.clip(implied * margin[None, :, None], 0.01, 0.99)))
+            # Even money is quoted +100
+            new_prices[new_prices == -100] = 100
+            new_points = np.stack([np.full((G, B), np.nan), np.full((G, B), np.nan),
+                                   spread_line, -spread_line, total_line, total_line], axis=-1)
+
+            # A book re-quotes a market when its line or either price moved by
+            # at least its step; both sides of the market update together
+            quoted = rng.random((G, B)) < refresh if poll else np.ones((G, B), dtype=bool)
+            new_line = (new_points != points) & ~np.isnan(new_points)
+            moved = (np.abs(new_prices - prices) >= step[None, :, None]) | new_line
+            moved = moved.reshape(G, B, 3, 2).any(axis=3)
+            changed = np.repeat(quoted[..., None] & moved, 2, axis=2) & ((new_prices != prices) | new_line)
+            np.copyto(prices, new_prices, where=changed, casting='unsafe')
+            np.copyto(points, new_points, where=changed, casting='unsafe')
+            yield poll, prices, points, changed
+
+    def _layout(self):
+        """Name columns of a full board, built once"""
+        if self._board is None:
+            G, B = self.n_games, self.n_books
+            per_game = B * len(SLOT_MARKETS)
+            game = np.repeat(np.arange(G, dtype=np.int32), per_game)
+            game_ids = pd.Categorical(self.game_ids)
+            commence = pd.Categorical(self.commence_times)
+            home = registry.teams.codes(self.home_teams)
+            away = registry.teams.codes(self.away_teams)
+            books = registry.books.codes([key.replace('_', '') for key in self.books])
+            sport = registry.sports.code(self.sport)
+            self._board = {
+                'game_id': pd.Categorical.from_codes(game_ids.codes[game], game_ids.categories),
+                'sport': registry.sports.from_codes(np.full(len(game), sport, dtype=np.int16)),
+                'commence_time': pd.Categorical.from_codes(commence.codes[game], commence.categories),
+                'home_team': registry.teams.from_codes(home[game]),
+                'away_team': registry.teams.from_codes(away[game]),
+                'book': registry.books.from_codes(np.tile(np.repeat(books, len(SLOT_MARKETS)), G)),
+                'market': registry.markets.from_codes(np.tile(SLOT_MARKETS, G * B)),
+                'outcome': registry.outcomes.from_codes(np.tile(SLOT_OUTCOMES, G * B)),
+            }
+        return self._board
+
+    def _frame(self, poll, prices, points, rows=None):
+        columns = self._layout()
+        prices, points = prices.ravel(), points.ravel()
+        if rows is not None:
+            columns = {name: values[rows] for name, values in columns.items()}
+            prices, points = prices[rows], points[rows]
+        df = pd.DataFrame(dict(columns, price=prices.copy(), point=points.copy()))
+        df['fetch_timestamp'] = pd.Timestamp(self.timestamp(poll))
+        return df
+
+    def boards(self):
+        """Yield the full long board of every poll, as parse_odds returns it"""
+        for poll, prices, points, _ in self.polls():
+            yield self._frame(poll, prices, points)
+
+    def ticks(self):
+        """Yield only the prices that changed at each poll (all of them at the first)"""
+        for poll, prices, points, changed in self.polls():
+            yield self._frame(poll, prices, points, np.flatnonzero(changed.ravel()))
+
+    def payloads(self):
+        """Yield ``(timestamp, body)`` per poll, body shaped like /sports/{sport}/odds/"""
+        titles = [key.replace('_', ' ').title() for key in self.books]
+        last_update = np.zeros((self.n_games, self.n_books), dtype=np.int64)
+        stamps = [self.timestamp(poll).strftime(API_TIME) for poll in range(self.n_polls)]
+
+        for poll, prices, points, changed in self.polls():
+            last_update[changed.any(axis=2)] = poll
+            price_rows = prices.astype(np.int32).tolist()
+            point_rows = points.tolist()
+            updated = last_update.tolist()
+
+            body = []
+            for g in range(self.n_games):
+                home, away = self.home_teams[g], self.away_teams[g]
+                bookmakers = []
+                for b, (price, point) in enumerate(zip(price_rows[g], point_rows[g])):
+                    bookmakers.append({
+                        'key': self.books[b],
+                        'title': titles[b],
+                        'last_update': stamps[updated[g][b]],
+                        'markets': [
+                            {'key': 'h2h', 'outcomes': [
+                                {'name': home, 'price': price[0]},
+                                {'name': away, 'price': price[1]}]},
+                            {'key': 'spreads', 'outcomes': [
+                                {'name': home, 'price': price[2], 'point': point[2]},
+                                {'name': away, 'price': price[3], 'point': point[3]}]},
+                            {'key': 'totals', 'outcomes': [
+                                {'name': 'Over', 'price': price[4], 'point': point[4]},
+                                {'name': 'Under', 'price': price[5], 'point': point[5]}]},
+                        ]
+                    })
+                body.append({
+                    'id': self.game_ids[g],
+                    'sport_key': self.sport,
+                    'commence_time': self.commence_times[g],
+                    'home_team': home,
+                    'away_team': away,
+                    'bookmakers': bookmakers
+                })
+            yield self.timestamp(poll), body
+
+
+def _generator(args):
+    return OddsTickGenerator(n_games=args.games, n_books=args.books, n_polls=args.polls,
+                             poll_seconds=args.poll_seconds, sport=args.sport, seed=args.seed,
+                             steam_rate=args.steam_rate)
+
+
+def _report(n_ticks, n_prices, elapsed):
+    print(f"✓ {n_ticks:,} ticks of {n_prices:,} quoted prices in {elapsed:.1f} s "
+          f"({n_ticks / elapsed:,.0f} ticks/s)")
+
+
+def write_ticks(args):
+    """Generate the tick stream, optionally to a Parquet file"""
+    gen = _generator(args)
+    writer = None
+    n_ticks = 0
+    start = time.perf_counter()
+    try:
+        for ticks in gen.ticks():
+            n_ticks += len(ticks)
+            if args.out:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(ticks, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(args.out, table.schema, compression='zstd')
+                writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    _report(n_ticks, gen.n_prices * gen.n_polls, time.perf_counter() - start)
+
+
+def write_store(args):
+    """Save every poll to an odds store (only changes are written)"""
+    from odds_store import OddsStore
+
+    gen = _generator(args)
+    store = OddsStore(args.db)
+    n_ticks = 0
+    start = time.perf_counter()
+    for board in gen.boards():
+        n_ticks += store.save_snapshot(board)
+    _report(n_ticks, gen.n_prices * gen.n_polls, time.perf_counter() - start)
+    print(f"✓ Saved to: {args.db}")
+
+
+def write_replay(args):
+    """Write every poll as an Odds API recording for odds_replay.py"""
+    from odds_replay import OddsRecorder
+
+    gen = _generator(args)
+    recorder = OddsRecorder(args.dir)
+    path = f"/sports/{gen.sport}/odds/"
+    params = {'regions': 'us', 'markets': 'h2h,spreads,totals', 'oddsFormat': 'american'}
+    headers = {'content-type': 'application/json',
+               'x-requests-remaining': str(max(500, gen.n_polls * 10)), 'x-requests-used': '0'}
+    start = time.perf_counter()
+    for timestamp, body in gen.payloads():
+        recorder.save(path, params, 200, headers, body, recorded_at=timestamp.timestamp())
+    print(f"✓ Wrote {gen.n_polls} polls of {gen.n_games} games x {gen.n_books} books "
+          f"to {args.dir} in {time.perf_counter() - start:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_parser(name, func, help):
+        p = sub.add_parser(name, help=help)
+        p.add_argument('--games', type=int, default=1000)
+        p.add_argument('--books', type=int, default=40)
+        p.add_argument('--polls', type=int, default=288)
+        p.add_argument('--poll-seconds', type=float, default=60)
+        p.add_argument('--sport', default='basketball_nba')
+        p.add_argument('--seed', type=int, default=0)
+        p.add_argument('--steam-rate', type=float, default=0.002, help="chance per game and poll")
+        p.set_defaults(func=func)
+        return p
+
+    p = add_parser('ticks', write_ticks, "generate the tick stream and report throughput")
+    p.add_argument('--out', default=None, help="write ticks to this Parquet file")
+
+    p = add_parser('store', write_store, "write every poll to an odds store")
+    p.add_argument('db')
+
+    p = add_parser('replay', write_replay, "write every poll as a replayable API recording")
+    p.add_argument('dir')
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import numpy as np
+
+
+def american_to_prob(odds):
+    """Convert American odds to implied probability (scalar or array)"""
+    odds = np.asarray(odds, dtype=np.float64)
+    prob = np.where(odds > 0, 100 / (odds + 100), np.abs(odds) / (np.abs(odds) + 100))
+    return prob if prob.ndim else float(prob)
+
+
+def prob_to_american(prob):
+    """Convert probability to American odds (scalar or array), +100 at even money"""
+    prob = np.asarray(prob, dtype=np.float64)
+    odds = np.where(prob > 0.5, -100 * prob / (1 - prob), 100 * (1 - prob) / prob)
+    return odds if odds.ndim else float(odds)
+
+
+def american_to_decimal(odds):
+    """Convert American odds to decimal odds (scalar or array)"""
+    odds = np.asarray(odds, dtype=np.float64)
+    decimal = np.where(odds > 0, odds / 100 + 1, 100 / np.abs(odds) + 1)
+    return decimal if decimal.ndim else float(decimal)
+
+
+def expected_value(prob, odds):
+    """Expected value per unit staked, in percent"""
+    decimal = american_to_decimal(odds)
+    return (prob * (decimal - 1) - (1 - prob)) * 100
+
+
+def kelly_fraction(prob, odds, fraction=0.25):
+    """Fractional Kelly stake as a share of bankroll, floored at zero"""
+    decimal = american_to_decimal(odds)
+    kelly = (prob * decimal - 1) / (decimal - 1)
+    return np.maximum(0, kelly * fraction)
@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Headers worth replaying; hop-by-hop and encoding headers are dropped
+# because the mock server re-serializes the body itself
+REPLAY_HEADERS = ('x-requests-remaining', 'x-requests-used', 'x-requests-last', 'content-type')
+
+
+class OddsRecorder:
+    """Save raw Odds API responses to disk for later replay.
+
+    Each response becomes ``<seq>.json`` holding the request path and
+    params (without the API key), status, headers, the body text exactly
+    as received and the wall-clock time it was received.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._seq = len([f for f in os.listdir(directory) if f.endswith('.json')])
+
+    def record(self, path, params, response):
+        """Write one response to the recording directory"""
+        return self.save(path, params, response.status_code, response.headers, response.text)
+
+    def save(self, path, params, status, headers, body, recorded_at=None):
+        """Write one response given as its parts, e.g. a synthetic one.
+
+        ``body`` is the raw response text; anything else is serialized
+        to JSON first.
+        """
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        entry = {
+            'recorded_at': time.time() if recorded_at is None else recorded_at,
+            'path': path,
+            'params': {k: v for k, v in params.items() if k != 'apiKey'},
+            'status': status,
+            'headers': {k.lower(): v for k, v in headers.items()
+                        if k.lower() in REPLAY_HEADERS},
+            'body': body
+        }
+
+        with self._lock:
+            file_path = os.path.join(self.directory, f"{self._seq:06d}.json")
+            self._seq += 1
+
+        with open(file_path, 'w') as f:
+            json.dump(entry, f)
+        return file_path
+
+
+def load_recordings(directory):
+    """Load recordings grouped by path, each list sorted by time"""
+    entries = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name)) as f:
+                entries.append(json.load(f))
+
+    if not entries:
+        raise ValueError(f"No recordings found in {directory}")
+
+    entries.sort(key=lambda e: e['recorded_at'])
+    start = entries[0]['recorded_at']
+
+    by_path = {}
+    for entry in entries:
+        entry['offset'] = entry['recorded_at'] - start
+        # Older recordings hold the decoded body
+        body = entry['body'] if isinstance(entry['body'], str) else json.dumps(entry['body'])
+        entry['payload'] = body.encode()
+        by_path.setdefault(entry['path'], []).append(entry)
+    return by_path
+
+
+class ReplayServer:
+    """Local stand-in for the Odds API serving recorded responses.
+
+    Recorded time is compressed by ``speedup``: with ``speedup=1440`` a
+    day of polls replays in a minute. Each request gets the latest
+    recording for its path at the current replay time, with the recorded
+    body sent byte for byte. Quota headers carry on from the first
+    recording's: ``x-requests-remaining`` counts down from its value (or
+    ``quota``) and requests past it get a 429 like the real API.
+    """
+
+    def __init__(self, directory, speedup=1.0, host='127.0.0.1', port=8765, quota=None, loop=False):
+        self.recordings = load_recordings(directory)
+        self.speedup = speedup
+        self.loop = loop
+        self.duration = max(e['offset'] for entries in self.recordings.values() for e in entries)
+
+        first = min((entries[0] for entries in self.recordings.values()), key=lambda e: e['offset'])
+        remaining = first['headers'].get('x-requests-remaining')
+        used = first['headers'].get('x-requests-used')
+        if quota is None:
+            quota = int(float(remaining)) if remaining else 500
+        self.quota = quota
+        # Requests already spent when recording, reported on top of ours
+        self.recorded_used = int(float(used)) if used else 0
+        self.used = 0
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.started_at = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v4"
+
+    def replay_offset(self):
+        """Seconds of recorded time elapsed since the server started"""
+        offset = (time.monotonic() - self.started_at) * self.speedup
+        if self.loop and self.duration > 0:
+            offset %= self.duration
+        return offset
+
+    def lookup(self, path):
+        """Latest recording for ``path`` at the current replay time"""
+        entries = self.recordings.get(path)
+        if not entries:
+            return None
+
+        offset = self.replay_offset()
+        chosen = entries[0]
+        for entry in entries:
+            if entry['offset'] > offset:
+                break
+            chosen = entry
+        return chosen
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path.startswith('/v4'):
+                    path = path[3:]
+
+                with server._lock:
+                    server.used += 1
+                    used = server.used
+                remaining = server.quota - used
+
+                if remaining < 0:
+                    self._send(429, {'message': 'Usage quota has been reached'},
+                               {'x-requests-remaining': '0',
+                                'x-requests-used': str(server.recorded_used + server.quota)})
+                    return
+
+                entry = server.lookup(path)
+                if entry is None:
+                    self._send(404, {'message': f"No recording for {path}"}, {})
+                    return
+
+                headers = dict(entry['headers'])
+                headers['x-requests-remaining'] = str(remaining)
+                headers['x-requests-used'] = str(server.recorded_used + used)
+                self._send_payload(entry['status'], entry['payload'], headers)
+
+            def _send(self, status, body, headers):
+                self._send_payload(status, json.dumps(body).encode(), headers)
+
+            def _send_payload(self, status, payload, headers):
+                self.send_response(status)
+                self.send_header('content-type', 'application/json')
+                for key, value in headers.items():
+                    if key != 'content-type':
+                        self.send_header(key, value)
+                self.send_header('content-length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Serve in a background thread"""
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.started_at = time.monotonic()
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def record(args):
+    """Poll the live API and save every response"""
+    from odds_scraper import OddsScraper
+
+    scraper = OddsScraper(recorder=OddsRecorder(args.out))
+    scraper.get_sports()
+    for poll in range(args.polls):
+        for sport in args.sports:
+            scraper.get_odds(sport)
+        print(f"✓ Recorded poll {poll + 1}/{args.polls}")
+        if poll + 1 < args.polls:
+            time.sleep(args.interval)
+
+
+def serve(args):
+    """Run the mock Odds API until interrupted"""
+    server = ReplayServer(args.dir, speedup=args.speedup, host=args.host,
+                          port=args.port, quota=args.quota, loop=args.loop)
+    print(f"✓ Replaying {args.dir} at {args.speedup:g}x on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+def load_test(args):
+    """Drive scrape -> store -> score against a replay server"""
+    from odds_scraper import OddsScraper
+    from edge_finder import EdgeFinder
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = ReplayServer(args.dir, speedup=args.speedup, port=0, loop=True).start()
+        base_url = server.base_url
+
+    scraper = OddsScraper(base_url=base_url)
+    finder = EdgeFinder()
+    timings = {'fetch': [], 'parse': [], 'store': [], 'score': []}
+
+    try:
+        for poll in range(args.polls):
+            start = time.perf_counter()
+            # The body is streamed, so reading it counts towards parse
+            raw = scraper.get_odds(args.sport)
+            fetched = time.perf_counter()
+            df = scraper.parse_odds(raw)
+            parsed = time.perf_counter()
+            scraper.save_to_db(df)
+            stored = time.perf_counter()
+            finder.find_opportunities()
+            scored = time.perf_counter()
+
+            timings['fetch'].append(fetched - start)
+            timings['parse'].append(parsed - fetched)
+            timings['store'].append(stored - parsed)
+            timings['score'].append(scored - stored)
+            if args.interval:
+                time.sleep(args.interval)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print("\nLOAD TEST RESULTS")
+    for stage, values in timings.items():
+        values = sorted(values)
+        p50 = values[len(values) // 2] * 1000
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))] * 1000
+        print(f"  {stage:6s} p50={p50:8.1f} ms  p95={p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay Odds API traffic")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('record', help="save live API responses")
+    p.add_argument('--out', default='data/recordings')
+    p.add_argument('--sports', nargs='+', default=['basketball_nba'])
+    p.add_argument('--polls', type=int, default=1)
+    p.add_argument('--interval', type=float, default=60.0)
+    p.set_defaults(func=record)
+
+    p = sub.add_parser('serve', help="run the mock Odds API")
+    p.add_argument('--dir', default='data/recordings')
+    p.add_argument('--speedup', type=float, default=1.0)
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--quota', type=int, default=None)
+    p.add_argument('--loop', action='store_true')
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser('loadtest', help="run the pipeline against a replay server")
+    p.add_argument('--dir', default='data/recordings')
+    p.add_argument('--base-url', default=None, help="existing server; default starts one")
+    p.add_argument('--speedup', type=float, default=1440.0)
+    p.add_argument('--sport', default='basketball_nba')
+    p.add_argument('--polls', type=int, default=100)
+    p.add_argument('--interval', type=float, default=0.0)
+    p.set_defaults(func=load_test)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,193 @@
 import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime
-import sqlite3
+from datetime import datetime, timezone
+from array import array
+import io
+import json
 import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config
+from settings import config
+from odds_store import OddsStore
+import registry
+import metrics
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+MARKETS = registry.MARKETS
+OUTCOMES = registry.OUTCOMES
+MARKET_CODES = {key: code for code, key in enumerate(MARKETS)}
+TOTALS_CODES = {'Over': 2, 'Under': 3, 'over': 2, 'under': 3}
+NAN = float('nan')
+NAN_PAIR = (NAN, NAN)
+
+
+def _iter_games(fp):
+    """Yield games from a JSON payload without decoding it all at once"""
+    if ijson is not None:
+        return ijson.items(fp, 'item', use_float=True)
+    return iter(json.load(fp))
+
+
+def _column(buffer, dtype):
+    """Copy a typed array buffer into a writable numpy column"""
+    return np.frombuffer(buffer, dtype=dtype).copy()
+
+
+class _OddsColumns:
+    """Columnar buffers for long-format odds rows.
+
+    Game, book and market codes are recorded once per market block and
+    expanded with ``np.repeat`` at the end; only price, point and outcome
+    are appended per outcome. Teams, books and sports are interned in the
+    shared registry, so every parsed board uses the same category codes.
+    Prices and points are kept as float32 (American odds and half-point
+    lines are exact in float32).
+    """
 
-class OddsScraper:
     def __init__(self):
+        self.game_ids = []
+        self.sports = array('h')
+        self.commence_times = []
+        self.home_teams = array('h')
+        self.away_teams = array('h')
+
+        self.block_game = array('i')
+        self.block_book = array('h')
+        self.block_market = array('b')
+        self.block_size = array('i')
+
+        self.outcome = array('b')
+        self.price = array('f')
+        self.point = array('f')
+
+        # Raw API book key -> registry code, skipping the normalization
+        self.books = {}
+
+    @property
+    def n_rows(self):
+        return len(self.price)
+
+    def _book(self, key):
+        code = self.books.get(key)
+        if code is None:
+            code = self.books[key] = registry.books.code(key.replace('_', ''))
+        return code
+
+    def add_game(self, game):
+        game_idx = len(self.game_ids)
+        home_team = game['home_team']
+        self.game_ids.append(game['id'])
+        self.sports.append(registry.sports.code(game['sport_key']))
+        self.commence_times.append(game['commence_time'])
+        self.home_teams.append(registry.teams.code(home_team))
+        self.away_teams.append(registry.teams.code(game['away_team']))
+
+        block_game, block_book = self.block_game.append, self.block_book.append
+        block_market, block_size = self.block_market.append, self.block_size.append
+        add_outcomes, add_prices, add_points = self.outcome.extend, self.price.extend, self.point.extend
+
+        for bookmaker in game.get('bookmakers', []):
+            book = self._book(bookmaker['key'])
+
+            for market in bookmaker.get('markets', []):
+                market_code = MARKET_CODES.get(market['key'])
+                if market_code is None:
+                    continue
+
+                outcomes = market['outcomes']
+                block_game(game_idx)
+                block_book(book)
+                block_market(market_code)
+                block_size(len(outcomes))
+
+                # Two-way markets are the norm; unpack them without a loop
+                if len(outcomes) == 2:
+                    first, second = outcomes
+                    add_prices((first['price'], second['price']))
+                    if market_code == 0:
+                        add_points(NAN_PAIR)
+                        add_outcomes((first['name'] != home_team, second['name'] != home_team))
+                    elif market_code == 1:
+                        add_points((first['point'], second['point']))
+                        add_outcomes((first['name'] != home_team, second['name'] != home_team))
+                    else:
+                        add_points((first['point'], second['point']))
+                        add_outcomes((TOTALS_CODES.get(first['name'], 3),
+                                      TOTALS_CODES.get(second['name'], 3)))
+                    continue
+
+                for outcome in outcomes:
+                    add_prices((outcome['price'],))
+                    add_points((outcome.get('point', NAN),))
+                    if market_code == 2:
+                        add_outcomes((TOTALS_CODES.get(outcome['name'], 3),))
+                    else:
+                        add_outcomes((outcome['name'] != home_team,))
+
+    def to_frame(self):
+        sizes = _column(self.block_size, np.int32)
+        row_game = np.repeat(_column(self.block_game, np.int32), sizes)
+        game_ids = pd.Categorical(self.game_ids)
+        commence = pd.Categorical(self.commence_times)
+        sports = _column(self.sports, np.int16)
+        home = _column(self.home_teams, np.int16)
+        away = _column(self.away_teams, np.int16)
+
+        return pd.DataFrame({
+            'game_id': pd.Categorical.from_codes(game_ids.codes[row_game], game_ids.categories),
+            'sport': registry.sports.from_codes(sports[row_game]),
+            'commence_time': pd.Categorical.from_codes(commence.codes[row_game], commence.categories),
+            'home_team': registry.teams.from_codes(home[row_game]),
+            'away_team': registry.teams.from_codes(away[row_game]),
+            'book': registry.books.from_codes(np.repeat(_column(self.block_book, np.int16), sizes)),
+            'market': registry.markets.from_codes(np.repeat(_column(self.block_market, np.int8), sizes)),
+            'outcome': registry.outcomes.from_codes(_column(self.outcome, np.int8)),
+            'price': _column(self.price, np.float32),
+            'point': _column(self.point, np.float32),
+        })
+
+class OddsScraper:
+    def __init__(self, base_url=None, recorder=None):
         self.api_key = config.ODDS_API_KEY
-        self.base_url = "https://api.the-odds-api.com/v4"
+        self.base_url = base_url or config.ODDS_API_BASE_URL
+        self.store = OddsStore(config.ODDS_DB_PATH)
+        # Optional odds_replay.OddsRecorder capturing raw responses
+        self.recorder = recorder
+    
+    def _get(self, path, params, stream=False):
+        """GET an API path, recording the raw response when enabled.
+
+        With ``stream`` the body is left unread for the caller, unless
+        the recorder has already read it.
+        """
+        with metrics.span('fetch'):
+            response = requests.get(f"{self.base_url}{path}", params=params, stream=stream)
+        if self.recorder is not None:
+            self.recorder.record(path, params, response)
+        response.raise_for_status()
+        return response
         
     def get_sports(self):
         """Get list of available sports"""
-        url = f"{self.base_url}/sports/"
         params = {'apiKey': self.api_key}
         
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            response = self._get("/sports/", params)
             return response.json()
         except Exception as e:
             print(f"Error fetching sports: {e}")
             return []
     
     def get_odds(self, sport='basketball_nba'):
-        """Fetch odds for a specific sport"""
-        url = f"{self.base_url}/sports/{sport}/odds/"
-        
+        """Fetch odds for a specific sport.
+
+        Returns the undecoded body for parse_odds: the live response
+        stream, so games are parsed as they arrive, or its bytes when a
+        recorder has already read it. Returns [] on errors.
+        """
         params = {
             'apiKey': self.api_key,
             'regions': 'us',
@@ -37,95 +196,70 @@ class OddsScraper:
         }
         
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            response = self._get(f"/sports/{sport}/odds/", params, stream=True)
             
             remaining = response.headers.get('x-requests-remaining')
             used = response.headers.get('x-requests-used')
             print(f"API Requests - Used: {used}, Remaining: {remaining}")
+            if remaining is not None:
+                metrics.gauge('odds_api_requests_remaining', float(remaining))
+            if used is not None:
+                metrics.gauge('odds_api_requests_used', float(used))
             
-            return response.json()
+            if self.recorder is not None:
+                return response.content
+            # Undo any gzip/deflate transfer encoding while streaming
+            response.raw.decode_content = True
+            return response.raw
         except Exception as e:
             print(f"Error fetching odds: {e}")
             return []
     
     def parse_odds(self, raw_data):
-        """Parse raw odds data into structured DataFrame"""
-        if not raw_data:
-            print("No data to parse")
-            return pd.DataFrame()
-        
-        games = []
+        """Parse raw odds data into a long DataFrame (one row per price).
+
+        ``raw_data`` is either the decoded list of games or a file-like
+        object / bytes holding the JSON payload, which is streamed game by
+        game when ``ijson`` is installed.
+        """
+        if isinstance(raw_data, (bytes, str)):
+            raw_data = io.BytesIO(raw_data.encode() if isinstance(raw_data, str) else raw_data)
+        if hasattr(raw_data, 'read'):
+            raw_data = _iter_games(raw_data)
         
-        for game in raw_data:
-            game_info = {
-                'game_id': game['id'],
-                'sport': game['sport_key'],
-                'commence_time': game['commence_time'],
-                'home_team': game['home_team'],
-                'away_team': game['away_team']
-            }
+        with metrics.span('parse'):
+            columns = _OddsColumns()
+            for game in raw_data:
+                columns.add_game(game)
             
-            # Extract bookmaker odds
-            for bookmaker in game.get('bookmakers', []):
-                book_key = bookmaker['key'].replace('_', '')
-                
-                for market in bookmaker.get('markets', []):
-                    market_key = market['key']
-                    
-                    if market_key == 'h2h':  # Moneyline
-                        for outcome in market['outcomes']:
-                            team_type = 'home' if outcome['name'] == game['home_team'] else 'away'
-                            game_info[f'{book_key}_{team_type}_ml'] = outcome['price']
-                    
-                    elif market_key == 'spreads':  # Spreads
-                        for outcome in market['outcomes']:
-                            team_type = 'home' if outcome['name'] == game['home_team'] else 'away'
-                            game_info[f'{book_key}_{team_type}_spread'] = outcome['point']
-                            game_info[f'{book_key}_{team_type}_spread_odds'] = outcome['price']
-                    
-                    elif market_key == 'totals':  # Totals
-                        for outcome in market['outcomes']:
-                            total_type = outcome['name'].lower()
-                            game_info[f'{book_key}_total_points'] = outcome['point']
-                            game_info[f'{book_key}_{total_type}_odds'] = outcome['price']
+            if columns.n_rows == 0:
+                print("No data to parse")
+                return pd.DataFrame()
             
-            games.append(game_info)
-        
-        df = pd.DataFrame(games)
-        df['fetch_timestamp'] = datetime.now()
+            df = columns.to_frame()
+            # Naive UTC, like commence_time, so the two compare directly
+            df['fetch_timestamp'] = pd.Timestamp(datetime.now(timezone.utc)).tz_localize(None)
+        metrics.count('rows_processed', len(df), stage='parse')
         return df
     
     def save_to_db(self, df):
-        """Save odds to database"""
+        """Save changed odds to database"""
         if df.empty:
             print("No data to save")
             return False
         
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(config.ODDS_DB_PATH), exist_ok=True)
+        n_changes = self.store.save_snapshot(df)
         
-        conn = sqlite3.connect(config.ODDS_DB_PATH)
-        df.to_sql('odds_history', conn, if_exists='append', index=False)
-        conn.close()
-        
-        print(f"✓ Saved {len(df)} games to database")
+        print(f"✓ Saved {df['game_id'].nunique()} games to database ({n_changes} price changes)")
         return True
     
-    def get_latest_odds(self):
-        """Get most recent odds from database"""
+    def get_latest_odds(self, as_of=None):
+        """Get most recent odds from database, or the board as of a timestamp"""
         if not os.path.exists(config.ODDS_DB_PATH):
             print("No database found. Run scraper first.")
             return pd.DataFrame()
         
-        conn = sqlite3.connect(config.ODDS_DB_PATH)
-        query = """
-            SELECT * FROM odds_history 
-            WHERE fetch_timestamp = (SELECT MAX(fetch_timestamp) FROM odds_history)
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        return self.store.get_snapshot(as_of=as_of, wide=True)
 
 def main():
     """Main execution"""
@@ -157,20 +291,25 @@ def main():
         print("✗ No NBA games found or API error")
         return
     
-    print(f"✓ Found {len(odds_data)} NBA games")
-    
     # Parse odds
     print("\n3. Parsing odds data...")
     df = scraper.parse_odds(odds_data)
-    print(f"✓ Parsed {len(df)} games")
+    if df.empty:
+        print("✗ No NBA games found")
+        return
+    print(f"✓ Parsed {len(df)} prices for {df['game_id'].nunique()} games")
     
     # Display sample
     print("\n4. Sample data:")
-    for idx, row in df.head(3).iterrows():
+    for game_id in df['game_id'].unique()[:3]:
+        game = df[df['game_id'] == game_id]
+        row = game.iloc[0]
         print(f"\n{row['away_team']} @ {row['home_team']}")
         print(f"Time: {row['commence_time']}")
-        if 'draftkings_home_ml' in row:
-            print(f"DraftKings ML: Home {row.get('draftkings_home_ml', 'N/A')} | Away {row.get('draftkings_away_ml', 'N/A')}")
+        ml = game[(game['book'] == 'draftkings') & (game['market'] == 'h2h')]
+        if not ml.empty:
+            prices = dict(zip(ml['outcome'], ml['price']))
+            print(f"DraftKings ML: Home {prices.get('home', 'N/A')} | Away {prices.get('away', 'N/A')}")
     
     # Save to database
     print("\n5. Saving to database...")
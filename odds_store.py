@@ -0,0 +1,397 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime, timezone
+import sqlite3
+import os
+from settings import config
+import registry
+import metrics
+
+# One stored price is identified by (game, book, market, outcome)
+KEY_COLUMNS = ['game_id', 'book', 'market', 'outcome']
+GAME_COLUMNS = ['game_id', 'sport', 'commence_time', 'home_team', 'away_team']
+
+# Wide column suffix -> (market, outcome, field), matching the legacy
+# odds_history layout produced by OddsScraper.parse_odds
+WIDE_COLUMNS = {
+    'home_ml': ('h2h', 'home', 'price'),
+    'away_ml': ('h2h', 'away', 'price'),
+    'home_spread': ('spreads', 'home', 'point'),
+    'away_spread': ('spreads', 'away', 'point'),
+    'home_spread_odds': ('spreads', 'home', 'price'),
+    'away_spread_odds': ('spreads', 'away', 'price'),
+    'over_odds': ('totals', 'over', 'price'),
+    'under_odds': ('totals', 'under', 'price'),
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Commence times are kept as the API sends them (UTC, second precision)
+COMMENCE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Text keys and timestamps are stored once, in ``prices`` and ``snapshots``;
+# the per-change table only holds integer ids and the quote
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS games (
+        game_id TEXT PRIMARY KEY,
+        sport TEXT,
+        commence_time TEXT,
+        home_team TEXT,
+        away_team TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_games_commence ON games (commence_time);
+    CREATE TABLE IF NOT EXISTS prices (
+        price_id INTEGER PRIMARY KEY,
+        game_id TEXT NOT NULL,
+        book TEXT NOT NULL,
+        market TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        UNIQUE (game_id, book, market, outcome)
+    );
+    CREATE TABLE IF NOT EXISTS snapshots (
+        snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fetch_timestamp TEXT NOT NULL,
+        sport TEXT,
+        n_rows INTEGER,
+        n_changes INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS odds_changes (
+        price_id INTEGER NOT NULL,
+        snapshot_id INTEGER NOT NULL,
+        price REAL,
+        point REAL,
+        PRIMARY KEY (price_id, snapshot_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS odds_latest (
+        price_id INTEGER PRIMARY KEY,
+        price REAL,
+        point REAL
+    );
+"""
+
+
+def utc_timestamp(ts):
+    """Naive UTC timestamp; naive inputs are taken to be UTC already"""
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert('UTC').tz_localize(None) if ts.tzinfo is not None else ts
+
+
+def format_timestamp(ts):
+    """Format a timestamp so that string order matches time order"""
+    return utc_timestamp(ts).strftime(TIMESTAMP_FORMAT)
+
+
+def format_commence(ts):
+    """Format a timestamp like the API's ``commence_time``"""
+    return utc_timestamp(ts).strftime(COMMENCE_FORMAT)
+
+
+def wide_to_long(df):
+    """Convert a wide odds frame (one row per game) to one row per price"""
+    frames = []
+    for column in df.columns:
+        book, _, suffix = column.partition('_')
+        if suffix == 'total_points':
+            for outcome in ('over', 'under'):
+                frames.append(pd.DataFrame({
+                    'game_id': df['game_id'], 'book': book, 'market': 'totals',
+                    'outcome': outcome, 'field': 'point', 'value': df[column]
+                }))
+        elif suffix in WIDE_COLUMNS:
+            market, outcome, field = WIDE_COLUMNS[suffix]
+            frames.append(pd.DataFrame({
+                'game_id': df['game_id'], 'book': book, 'market': market,
+                'outcome': outcome, 'field': field, 'value': df[column]
+            }))
+
+    if not frames:
+        return pd.DataFrame(columns=KEY_COLUMNS + ['price', 'point'])
+
+    long_df = pd.concat(frames, ignore_index=True)
+    long_df = long_df.pivot_table(
+        index=KEY_COLUMNS, columns='field', values='value', aggfunc='last'
+    ).reset_index()
+    long_df.columns.name = None
+    for field in ('price', 'point'):
+        if field not in long_df:
+            long_df[field] = np.nan
+    # Outcomes missing a price were never quoted
+    long_df = long_df[long_df['price'].notna()]
+
+    games = df[GAME_COLUMNS].drop_duplicates('game_id')
+    return long_df.merge(games, on='game_id', how='left')
+
+
+def long_to_wide(long_df):
+    """Rebuild the legacy wide layout (one row per game) from price rows"""
+    if long_df.empty:
+        return pd.DataFrame()
+
+    pieces = []
+    for suffix, (market, outcome, field) in WIDE_COLUMNS.items():
+        part = long_df[(long_df['market'] == market) & (long_df['outcome'] == outcome)]
+        if part.empty:
+            continue
+        pieces.append(pd.DataFrame({
+            'game_id': np.asarray(part['game_id'], dtype=object),
+            'column': np.asarray(part['book'], dtype=object) + ('_' + suffix),
+            'value': part[field].values
+        }))
+    totals = long_df[long_df['market'] == 'totals']
+    if not totals.empty:
+        pieces.append(pd.DataFrame({
+            'game_id': np.asarray(totals['game_id'], dtype=object),
+            'column': np.asarray(totals['book'], dtype=object) + '_total_points',
+            'value': totals['point'].values
+        }))
+
+    wide = pd.concat(pieces, ignore_index=True).pivot_table(
+        index='game_id', columns='column', values='value', aggfunc='last'
+    )
+    wide.columns.name = None
+    games = long_df[GAME_COLUMNS].drop_duplicates('game_id')
+    games = games.set_index(np.asarray(games['game_id'], dtype=object)).drop(columns='game_id')
+    return games.join(wide).rename_axis('game_id').reset_index()
+
+
+class OddsStore:
+    """Change-only odds history with as-of snapshot reconstruction.
+
+    Each (game, book, market, outcome) gets an integer ``price_id`` in
+    ``prices`` and each save an integer ``snapshot_id`` in ``snapshots``.
+    A row keyed on (price_id, snapshot_id) is written to ``odds_changes``
+    only when the price or point moves. Prices that drop off the board get
+    a tombstone row (NULL price) so as-of queries stop returning them.
+    ``odds_latest`` mirrors the current board for cheap delta checks.
+    Snapshots are expected to be saved in time order.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or config.ODDS_DB_PATH
+
+    def connect(self):
+        """Open a connection and make sure the schema exists"""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def save_snapshot(self, df, fetch_timestamp=None):
+        """Store the prices in ``df`` that changed since the last snapshot.
+
+        ``df`` may be in long format (one row per price) or in the legacy
+        wide format. Returns the number of change rows written.
+        """
+        if df.empty:
+            return 0
+
+        with metrics.span('db_write'):
+            n_changes = self._save_snapshot(df, fetch_timestamp)
+        metrics.count('rows_processed', len(df), stage='db_write')
+        metrics.count('odds_changes_written', n_changes)
+        return n_changes
+
+    def _save_snapshot(self, df, fetch_timestamp):
+        if 'market' not in df.columns:
+            df = wide_to_long(df)
+
+        if fetch_timestamp is None:
+            if 'fetch_timestamp' in df.columns:
+                fetch_timestamp = df['fetch_timestamp'].iloc[0]
+            else:
+                fetch_timestamp = datetime.now(timezone.utc)
+        ts = format_timestamp(fetch_timestamp)
+
+        new = df[KEY_COLUMNS + ['price', 'point']].copy()
+        for column in KEY_COLUMNS:
+            new[column] = np.asarray(new[column], dtype=object)
+        new['price'] = new['price'].astype('float64')
+        new['point'] = new['point'].astype('float64')
+        new = new.drop_duplicates(KEY_COLUMNS, keep='last')
+        sports = [str(s) for s in df['sport'].dropna().unique()]
+
+        conn = self.connect()
+        try:
+            games = df[GAME_COLUMNS].drop_duplicates('game_id')
+            conn.executemany(
+                "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?)",
+                games.astype(object).where(games.notna(), None).itertuples(index=False, name=None)
+            )
+
+            # Current board for the sports in this snapshot only, so polling
+            # one sport never tombstones another
+            placeholders = ','.join('?' * len(sports))
+            old = pd.read_sql_query(f"""
+                SELECT l.price_id, p.game_id, p.book, p.market, p.outcome, l.price, l.point
+                FROM odds_latest l
+                JOIN prices p ON p.price_id = l.price_id
+                JOIN games g ON g.game_id = p.game_id
+                WHERE g.sport IN ({placeholders})
+            """, conn, params=sports)
+            old['price'] = old['price'].astype('float64')
+            old['point'] = old['point'].astype('float64')
+
+            merged = new.merge(old, on=KEY_COLUMNS, how='outer',
+                               suffixes=('', '_old'), indicator=True)
+            is_new = merged['_merge'] == 'left_only'
+            is_gone = merged['_merge'] == 'right_only'
+            moved = (merged['_merge'] == 'both') & (
+                ~_same(merged['price'], merged['price_old'])
+                | ~_same(merged['point'], merged['point_old'])
+            )
+
+            if is_new.any():
+                merged.loc[is_new, 'price_id'] = self._price_ids(conn, merged.loc[is_new, KEY_COLUMNS])
+
+            changes = merged.loc[is_new | moved, ['price_id', 'price', 'point']]
+            gone = merged.loc[is_gone, 'price_id']
+
+            cursor = conn.execute(
+                "INSERT INTO snapshots (fetch_timestamp, sport, n_rows, n_changes) VALUES (?, ?, ?, ?)",
+                (ts, ','.join(sports), len(new), len(changes) + len(gone))
+            )
+            snapshot_id = cursor.lastrowid
+
+            rows = _records(changes)
+            tombstones = [(int(price_id), None, None) for price_id in gone]
+            conn.executemany(
+                "INSERT INTO odds_changes VALUES (?, ?, ?, ?)",
+                [(price_id, snapshot_id, price, point) for price_id, price, point in rows + tombstones]
+            )
+            conn.executemany("INSERT OR REPLACE INTO odds_latest VALUES (?, ?, ?)", rows)
+            conn.executemany("DELETE FROM odds_latest WHERE price_id = ?",
+                             ((price_id,) for price_id, _, _ in tombstones))
+            conn.commit()
+        finally:
+            conn.close()
+
+        return len(rows) + len(tombstones)
+
+    def _price_ids(self, conn, keys):
+        """Look up ``price_id`` for each key row, registering unseen keys"""
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS new_keys (game_id, book, market, outcome)")
+        conn.execute("DELETE FROM new_keys")
+        conn.executemany("INSERT INTO new_keys VALUES (?, ?, ?, ?)",
+                         keys.itertuples(index=False, name=None))
+        conn.execute("""
+            INSERT OR IGNORE INTO prices (game_id, book, market, outcome)
+            SELECT game_id, book, market, outcome FROM new_keys
+        """)
+        ids = pd.read_sql_query("""
+            SELECT p.price_id, p.game_id, p.book, p.market, p.outcome
+            FROM new_keys k JOIN prices p
+                ON p.game_id = k.game_id AND p.book = k.book
+                AND p.market = k.market AND p.outcome = k.outcome
+        """, conn)
+        return keys.merge(ids, on=KEY_COLUMNS, how='left')['price_id'].values
+
+    def get_snapshot(self, as_of=None, sport=None, wide=False):
+        """Rebuild the full odds board as it stood at ``as_of``.
+
+        With ``as_of=None`` the current board is read straight from
+        ``odds_latest``. Otherwise only games that had not started by
+        ``as_of`` (UTC) are returned, and each of their prices seeks its
+        last change at or before ``as_of`` on the (price_id, snapshot_id)
+        key, so the read never scans the rest of the history.
+        """
+        if not os.path.exists(self.db_path):
+            return pd.DataFrame()
+
+        conn = self.connect()
+        try:
+            if as_of is None:
+                ts = conn.execute("SELECT MAX(fetch_timestamp) FROM snapshots").fetchone()[0]
+                source = """
+                    odds_latest b
+                    JOIN prices p ON p.price_id = b.price_id
+                    JOIN games g ON g.game_id = p.game_id
+                """
+                where = ""
+                params = []
+            else:
+                ts = format_timestamp(as_of)
+                snapshot_id = conn.execute(
+                    "SELECT MAX(snapshot_id) FROM snapshots WHERE fetch_timestamp <= ?", (ts,)
+                ).fetchone()[0]
+                # CROSS JOIN pins the loop order: upcoming games, their
+                # prices, then one primary key seek per price
+                source = """
+                    games g
+                    CROSS JOIN prices p ON p.game_id = g.game_id
+                    CROSS JOIN odds_changes b ON b.price_id = p.price_id AND b.snapshot_id = (
+                        SELECT snapshot_id FROM odds_changes
+                        WHERE price_id = p.price_id AND snapshot_id <= ?
+                        ORDER BY snapshot_id DESC LIMIT 1
+                    )
+                """
+                where = " AND g.commence_time > ?"
+                params = [snapshot_id, format_commence(as_of)]
+
+            query = f"""
+                SELECT p.game_id, g.sport, g.commence_time, g.home_team, g.away_team,
+                       p.book, p.market, p.outcome, b.price, b.point
+                FROM {source}
+                WHERE b.price IS NOT NULL{where}
+            """
+            if sport is not None:
+                query += " AND g.sport = ?"
+                params.append(sport)
+
+            with metrics.span('db_read'):
+                df = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+
+        df = compact_board(df)
+
+        df['fetch_timestamp'] = pd.Timestamp(ts) if ts else pd.NaT
+        if wide:
+            fetched = df['fetch_timestamp'].iloc[0] if len(df) else pd.NaT
+            df = long_to_wide(df)
+            if not df.empty:
+                df['fetch_timestamp'] = fetched
+        return df
+
+    def get_history(self, game_id):
+        """Get every recorded price change for one game"""
+        if not os.path.exists(self.db_path):
+            return pd.DataFrame()
+
+        conn = self.connect()
+        try:
+            return pd.read_sql_query("""
+                SELECT p.game_id, p.book, p.market, p.outcome, c.price, c.point, s.fetch_timestamp
+                FROM prices p
+                JOIN odds_changes c ON c.price_id = p.price_id
+                JOIN snapshots s ON s.snapshot_id = c.snapshot_id
+                WHERE p.game_id = ?
+                ORDER BY p.book, p.market, p.outcome, c.snapshot_id
+            """, conn, params=[game_id])
+        finally:
+            conn.close()
+
+
+def compact_board(df):
+    """Registry categoricals for names and float32 prices, as parse_odds produces"""
+    for column, names in (('sport', registry.sports), ('home_team', registry.teams),
+                          ('away_team', registry.teams), ('book', registry.books),
+                          ('market', registry.markets), ('outcome', registry.outcomes)):
+        df[column] = names.categorical(df[column])
+    for column in ('game_id', 'commence_time'):
+        df[column] = df[column].astype('category')
+    df['price'] = df['price'].astype(np.float32)
+    df['point'] = df['point'].astype(np.float32)
+    return df
+
+
+def _same(a, b):
+    """Elementwise equality treating NaN == NaN as unchanged"""
+    return (a == b) | (a.isna() & b.isna())
+
+
+def _records(df):
+    """``(price_id, price, point)`` rows with NaN mapped to NULL"""
+    df = df.astype(object).where(df.notna(), None)
+    return [(int(price_id), price, point) for price_id, price, point in df.itertuples(index=False, name=None)]
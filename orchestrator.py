@@ -0,0 +1,349 @@
+"""Long-running odds pipeline: fetch -> parse -> store -> features -> score -> alert.
+
+Each stage is a pool of worker threads reading from a bounded queue and
+writing to the next stage's queue, so one snapshot flows through every
+stage in memory while the next one is already being fetched. A full
+queue blocks the stage feeding it (backpressure reaches the poll
+scheduler, which then polls late rather than piling up snapshots).
+
+Stopping (Ctrl-C, SIGTERM or ``stop()``) ends the poll schedule and lets
+every snapshot already in flight drain through to alerts before the
+workers exit.
+
+    python orchestrator.py [--sport basketball_nba ...] [--poll-seconds 30]
+                           [--workers fetch=2 parse=2] [--queue-size 4]
+                           [--max-polls N] [--record] [--base-url URL]
+"""
+import argparse
+import itertools
+import queue
+import signal
+import statistics
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+import metrics
+
+# The pipeline modules (pandas, xgboost, requests) are imported where they
+# are used, so cli.py can build its parser from add_arguments cheaply
+
+STAGES = ['fetch', 'parse', 'store', 'features', 'score', 'alert']
+
+# Marks the end of the stream; each worker of a stage gets one
+STOP = object()
+
+
+class Stage:
+    """A named pool of workers applying ``func`` to items from ``inbox``.
+
+    ``func`` returns the item to pass on, or None to drop it. Errors are
+    printed and counted but never stop the worker. When the last worker of
+    a stage exits it sends one STOP per worker of the next stage.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=4):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.next = None
+        self._running = workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self.inbox.get()
+            if item is STOP:
+                break
+            metrics.gauge('queue_depth', self.inbox.qsize(), stage=self.name)
+
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"✗ {self.name} failed for {item.get('sport')}: {e}")
+                metrics.count('stage_errors', stage=self.name)
+                continue
+
+            if result is not None and self.next is not None:
+                self.next.inbox.put(result)
+
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last and self.next is not None:
+            for _ in range(self.next.workers):
+                self.next.inbox.put(STOP)
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+class Orchestrator:
+    """Poll sports on a schedule and push each snapshot through the stages.
+
+    Items passed between stages are dicts that start as ``{'sport', 'seq'}``
+    and gain ``raw``, ``board``, ``games``/``X``, ``on_board`` and
+    ``opportunities`` on the way. ``seq`` orders snapshots per sport, so with
+    several parse workers a snapshot overtaken by a newer one is dropped
+    instead of stored over it.
+    """
+
+    def __init__(self, sports=('basketball_nba',), poll_seconds=30, queue_size=4, workers=None,
+                 scraper=None, finder=None, ledger=None, on_alert=None, max_polls=None):
+        from odds_scraper import OddsScraper
+        from edge_finder import EdgeFinder
+
+        self.sports = list(sports)
+        self.poll_seconds = poll_seconds
+        self.max_polls = max_polls
+        self.scraper = scraper or OddsScraper()
+        self.finder = finder or EdgeFinder()
+        self.finder.predictions.load()
+        self.ledger = ledger
+        self.on_alert = on_alert or print_alert
+
+        workers = workers or {}
+        funcs = [self._fetch, self._parse, self._store, self._features, self._score, self._alert]
+        self.stages = [Stage(name, func, workers.get(name, 1), queue_size)
+                       for name, func in zip(STAGES, funcs)]
+        for stage, following in zip(self.stages, self.stages[1:]):
+            stage.next = following
+
+        self._seq = itertools.count()
+        self._stopping = threading.Event()
+        self._scheduler = None
+        self._lock = threading.Lock()
+        self._store_locks = {}
+        self._stored_seq = {}
+        self._alerted_seq = {}
+        # Sport -> {(game_id, market, selection): last alerted quote}
+        self._alerted = {}
+        self.latencies = deque(maxlen=1000)
+
+    # Stage functions
+
+    def _fetch(self, item):
+        raw = self.scraper.get_odds(item['sport'])
+        if not raw:
+            return None
+        item['received_at'] = time.perf_counter()
+        item['raw'] = raw
+        return item
+
+    def _parse(self, item):
+        item['board'] = self.scraper.parse_odds(item.pop('raw'))
+        return item if not item['board'].empty else None
+
+    def _store(self, item):
+        sport = item['sport']
+        with self._lock:
+            store_lock = self._store_locks.setdefault(sport, threading.Lock())
+
+        # Held through the save so an older snapshot of the sport can
+        # never be written after a newer one; other sports store in parallel
+        with store_lock:
+            if item['seq'] < self._stored_seq.get(sport, -1):
+                metrics.count('stale_snapshots', stage='store')
+                return None
+            first = sport not in self._stored_seq
+            self._stored_seq[sport] = item['seq']
+            n_changes = self.scraper.store.save_snapshot(item['board'])
+        # Nothing moved: the last alerts for this sport still stand
+        if n_changes == 0 and not first:
+            metrics.count('unchanged_snapshots')
+            return None
+        return item
+
+    def _features(self, item):
+        item['games'], item['X'] = self.finder.board_features(item['board'])
+        return item if item['X'] is not None else None
+
+    def _score(self, item):
+        board = item.pop('board')
+        item['on_board'] = set(map(str, board['game_id'].unique()))
+        item['opportunities'] = self.finder.score_features(board, item.pop('games'), item.pop('X'))
+        return item
+
+    def _alert(self, item):
+        from odds_store import format_commence
+
+        sport = item['sport']
+        opps = item['opportunities']
+        with self._lock:
+            if item['seq'] < self._alerted_seq.get(sport, -1):
+                metrics.count('stale_snapshots', stage='alert')
+                return None
+            self._alerted_seq[sport] = item['seq']
+
+            # Forget games that left the board or have started, so the
+            # alerted quotes stay bounded by the current board
+            now = format_commence(datetime.now(timezone.utc))
+            alerted = self._alerted[sport] = {
+                key: quote for key, quote in self._alerted.get(sport, {}).items()
+                if key[0] in item['on_board'] and quote[0] > now
+            }
+
+            # Only alert on sides of upcoming games that are new or whose
+            # best price or line moved
+            fresh = []
+            for i, opp in enumerate(opps.itertuples(index=False)):
+                if opp.commence_time <= now:
+                    continue
+                key = (opp.game_id, opp.market, opp.selection)
+                quote = (opp.commence_time, opp.bookmaker, opp.odds, opp.recommended_bet)
+                if alerted.get(key) != quote:
+                    alerted[key] = quote
+                    fresh.append(i)
+
+        latency = time.perf_counter() - item['received_at']
+        self.latencies.append(latency)
+        metrics.observe('poll_to_alert', latency)
+
+        if fresh:
+            new = opps.iloc[fresh]
+            self.on_alert(new, latency)
+            if self.ledger is not None:
+                self.ledger.record(new)
+        return None
+
+    # Lifecycle
+
+    def _schedule(self):
+        fetch = self.stages[0]
+        polls = 0
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            for sport in self.sports:
+                fetch.inbox.put({'sport': sport, 'seq': next(self._seq)})
+            polls += 1
+            if self.max_polls and polls >= self.max_polls:
+                break
+            self._stopping.wait(max(0.0, self.poll_seconds - (time.monotonic() - started)))
+
+        for _ in range(fetch.workers):
+            fetch.inbox.put(STOP)
+
+    def start(self):
+        """Start every stage and the poll scheduler"""
+        for stage in self.stages:
+            stage.start()
+        self._scheduler = threading.Thread(target=self._schedule, name='scheduler', daemon=True)
+        self._scheduler.start()
+        return self
+
+    def stop(self):
+        """Stop polling; snapshots already in flight still drain"""
+        self._stopping.set()
+
+    def join(self, timeout=None):
+        """Wait for the scheduler and then every stage, in pipeline order"""
+        self._scheduler.join(timeout)
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def run(self):
+        """Run until the poll budget is spent or a stop signal arrives"""
+        previous = {sig: signal.signal(sig, lambda *_: self.stop())
+                    for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            self.start()
+            # Poll with a timeout so signals are handled promptly
+            while self._scheduler.is_alive():
+                self._scheduler.join(0.2)
+            self.join()
+        finally:
+            self.finder.predictions.save()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def latency_summary(self):
+        """p50/p95/max seconds from odds arriving to alerts being emitted"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return {
+            'n': len(ordered),
+            'p50': statistics.median(ordered),
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'max': ordered[-1]
+        }
+
+
+def print_alert(opportunities, latency):
+    """Default alert sink: one line per new or repriced opportunity"""
+    for _, opp in opportunities.iterrows():
+        print(f"🔔 {opp['game']}: {opp['recommended_bet']} {opp['odds']:+d} ({opp['bookmaker']}) "
+              f"edge +{opp['edge']:.1f}%  [{latency * 1000:.0f} ms]")
+
+
+def parse_workers(values):
+    """Turn ['fetch=2', 'parse=2'] into {'fetch': 2, 'parse': 2}"""
+    workers = {}
+    for value in values or []:
+        name, _, n = value.partition('=')
+        if name not in STAGES or not n.isdigit() or int(n) < 1:
+            raise argparse.ArgumentTypeError(f"expected STAGE=N with STAGE in {STAGES}, got {value!r}")
+        workers[name] = int(n)
+    return workers
+
+
+def add_arguments(parser):
+    """Options for a pipeline run, shared with ``cli.py run``"""
+    parser.add_argument('--sport', nargs='+', default=['basketball_nba'])
+    parser.add_argument('--poll-seconds', type=float, default=30.0)
+    parser.add_argument('--queue-size', type=int, default=4, help="bound on each stage's input queue")
+    parser.add_argument('--workers', nargs='+', metavar='STAGE=N', default=None,
+                        help=f"threads per stage, stages: {', '.join(STAGES)}")
+    parser.add_argument('--max-polls', type=int, default=None, help="stop after this many poll cycles")
+    parser.add_argument('--record', action='store_true', help="record alerts as bets in the ledger")
+    parser.add_argument('--base-url', default=None, help="Odds API base URL, e.g. a replay server")
+
+
+def run(args):
+    """Build and run an orchestrator from parsed arguments"""
+    from odds_scraper import OddsScraper
+    from edge_finder import EdgeFinder
+    from bet_ledger import BetLedger
+
+    finder = EdgeFinder()
+    if not finder.has_models():
+        return 1
+
+    orchestrator = Orchestrator(
+        sports=args.sport,
+        poll_seconds=args.poll_seconds,
+        queue_size=args.queue_size,
+        workers=parse_workers(args.workers),
+        scraper=OddsScraper(base_url=args.base_url),
+        finder=finder,
+        ledger=BetLedger() if args.record else None,
+        max_polls=args.max_polls
+    )
+    print(f"Polling {', '.join(args.sport)} every {args.poll_seconds:g}s (Ctrl-C to stop)")
+    orchestrator.run()
+
+    summary = orchestrator.latency_summary()
+    if summary:
+        print(f"\n✓ {summary['n']} snapshots scored; odds-to-alert latency "
+              f"p50 {summary['p50'] * 1000:.0f} ms, p95 {summary['p95'] * 1000:.0f} ms, "
+              f"max {summary['max'] * 1000:.0f} ms")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+import sqlite3
+import os
+from settings import config
+from bet_ledger import BETS_DB_PATH
+
+UNIT_SIZE = config.UNIT_SIZE
+
+MARKET_LABELS = {'spreads': 'Spreads', 'totals': 'Totals', 'h2h': 'Moneylines'}
+
+
+def connect(db_path=None):
+    """Open the bet ledger, or return None if no bets have been recorded"""
+    db_path = db_path or BETS_DB_PATH
+    if not os.path.exists(db_path):
+        return None
+
+    conn = sqlite3.connect(db_path)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ledger_daily'"
+    ).fetchone()
+    if not exists:
+        conn.close()
+        return None
+    return conn
+
+
+# The queries below read the ledger's incrementally maintained rollups
+# (one row per day and market), so their cost does not grow with the
+# number of bets.
+
+def weekly_performance(conn):
+    """Profit, bet count and win rate per settlement week"""
+    return pd.read_sql_query("""
+        SELECT strftime('%Y-W%W', day) AS week,
+               SUM(profit) AS profit,
+               SUM(bets) AS bets,
+               ROUND(100.0 * SUM(won) / MAX(SUM(won + lost), 1), 1) AS winRate
+        FROM ledger_daily
+        GROUP BY week
+        ORDER BY week
+    """, conn)
+
+
+def cumulative_roi(conn, max_points=200):
+    """Cumulative ROI and units by settlement day, downsampled for plotting.
+
+    Running sums are computed in SQLite with window functions; long
+    series are then reduced with LTTB.
+    """
+    df = pd.read_sql_query(f"""
+        SELECT day,
+               100.0 * SUM(profit) OVER w / SUM(stake) OVER w AS roi,
+               SUM(profit) OVER w / {float(UNIT_SIZE)} AS units
+        FROM (
+            SELECT day, SUM(profit) AS profit, SUM(stake) AS stake
+            FROM ledger_daily
+            GROUP BY day
+        )
+        WINDOW w AS (ORDER BY day ROWS UNBOUNDED PRECEDING)
+        ORDER BY day
+    """, conn)
+
+    if len(df) > max_points:
+        x = pd.to_datetime(df['day']).astype('int64').to_numpy()
+        keep = lttb(x, df['roi'].to_numpy(), max_points)
+        df = df.iloc[keep]
+
+    return df.rename(columns={'day': 'date'}).reset_index(drop=True)
+
+
+def market_accuracy(conn):
+    """Hit rate per market against the market's own implied probability"""
+    df = pd.read_sql_query("""
+        SELECT market,
+               100.0 * won / (won + lost) AS ourModel,
+               100.0 * implied_sum / (won + lost) AS vegas,
+               won + lost AS bets
+        FROM ledger_totals
+        WHERE won + lost > 0
+        ORDER BY market
+    """, conn)
+    df['category'] = df['market'].map(MARKET_LABELS).fillna(df['market'])
+    return df[['category', 'ourModel', 'vegas', 'bets']]
+
+
+def ledger_summary(conn):
+    """Headline profit, win rate and ROI from the running totals"""
+    row = conn.execute("""
+        SELECT SUM(profit), SUM(won), SUM(lost), SUM(settled_stake), SUM(pending), SUM(implied_sum)
+        FROM ledger_totals
+    """).fetchone()
+    profit, won, lost, stake, pending, implied = (v or 0 for v in row)
+    week_profit = conn.execute("""
+        SELECT COALESCE(SUM(profit), 0) FROM ledger_daily WHERE day >= date('now', '-6 days')
+    """).fetchone()[0]
+
+    graded = won + lost
+    return {
+        'profit': profit,
+        'week_profit': week_profit,
+        'win_rate': 100.0 * won / graded if graded else 0.0,
+        'market_rate': 100.0 * implied / graded if graded else 0.0,
+        'roi': 100.0 * profit / stake if stake else 0.0,
+        'pending': pending
+    }
+
+
+def clv_summary(conn):
+    """Share of settled bets beating the close and mean CLV, per market and overall.
+
+    Reads the per-bet CLV columns filled in by BetLedger.update_clv.
+    """
+    from clv import summarize_clv
+
+    df = pd.read_sql_query("""
+        SELECT game_id, market, clv_price, clv_consensus
+        FROM bets
+        WHERE close_odds IS NOT NULL
+    """, conn)
+    summary = summarize_clv(df)
+    if not summary.empty:
+        summary['market'] = summary['market'].map(MARKET_LABELS).fillna(summary['market'])
+        summary['bets'] = summary['bets'].astype(int)
+    return summary
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of ``n_out`` points that preserve the visual shape
+    of the series, always keeping the first and last point.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+
+    return keep
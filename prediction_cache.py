@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import os
+import threading
+from collections import OrderedDict
+from settings import config
+import metrics
+
+
+def row_hashes(X):
+    """64-bit hash of every feature row (values only, column order matters)"""
+    return pd.util.hash_pandas_object(X, index=False).to_numpy()
+
+
+class PredictionCache:
+    """Bounded LRU of model probabilities keyed by (model version, feature row hash).
+
+    Within a game day team features barely move between polls, so most
+    rows on a new board were already scored by the same model; only the
+    rows that miss go to the booster. A new model version never matches
+    old keys, and ``invalidate`` drops a version's entries (or everything)
+    when a model is reloaded or the features are rebuilt.
+
+    With ``path`` set, ``save()`` and ``load()`` persist the cache as an
+    ``.npz`` file so a restart begins warm.
+    """
+
+    def __init__(self, max_entries=None, path=None):
+        self.max_entries = max_entries or config.PREDICTION_CACHE_SIZE
+        self.path = path if path is not None else config.PREDICTION_CACHE_PATH
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def predict(self, model_version, X, predict_fn):
+        """Probabilities for every row of ``X``, calling ``predict_fn`` on misses only"""
+        hashes = row_hashes(X)
+        probs = np.empty(len(X), dtype=np.float32)
+        missing = []
+
+        with self._lock:
+            entries = self._entries
+            for i, h in enumerate(hashes.tolist()):
+                key = (model_version, h)
+                prob = entries.get(key)
+                if prob is None:
+                    missing.append(i)
+                else:
+                    entries.move_to_end(key)
+                    probs[i] = prob
+
+        metrics.cache('prediction', hit=True, n=len(X) - len(missing))
+        if not missing:
+            return probs
+
+        metrics.cache('prediction', hit=False, n=len(missing))
+        fresh = np.asarray(predict_fn(X.iloc[missing]), dtype=np.float32)
+        probs[missing] = fresh
+
+        with self._lock:
+            for h, prob in zip(hashes[missing].tolist(), fresh.tolist()):
+                self._entries[(model_version, h)] = prob
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return probs
+
+    def invalidate(self, model_version=None):
+        """Drop one model version's entries, or all of them"""
+        with self._lock:
+            if model_version is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == model_version]:
+                del self._entries[key]
+
+    def save(self, path=None):
+        """Write the cache (least recently used first) to an .npz file"""
+        path = path or self.path
+        if not path:
+            return None
+        with self._lock:
+            keys = list(self._entries)
+            probs = np.fromiter(self._entries.values(), dtype=np.float32, count=len(keys))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path,
+                 versions=np.array([k[0] for k in keys], dtype=str),
+                 hashes=np.array([k[1] for k in keys], dtype=np.uint64),
+                 probs=probs)
+        return path
+
+    def load(self, path=None):
+        """Merge a saved cache in; returns the number of entries read"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        data = np.load(path)
+        versions, hashes, probs = data['versions'].tolist(), data['hashes'].tolist(), data['probs'].tolist()
+        with self._lock:
+            for version, h, prob in zip(versions, hashes, probs):
+                self._entries[(version, h)] = prob
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return len(probs)
@@ -0,0 +1,94 @@
+"""Shared name registry for teams, books, markets, outcomes and sports.
+
+Every frame in the pipeline stores these names as pandas categoricals
+over the same interned category lists, so a team or book has one small
+integer code everywhere: in the training history, in parsed odds boards
+and in scored opportunities. Codes are assigned on first sight and never
+change for the life of the process; category lists only grow.
+
+    from registry import teams, books
+    df['home_team'] = teams.categorical(df['home_team'])
+    code = books.code('draftkings')
+"""
+import threading
+import numpy as np
+import pandas as pd
+
+NBA_TEAMS = [
+    'Boston Celtics', 'Brooklyn Nets', 'New York Knicks', 'Philadelphia 76ers', 'Toronto Raptors',
+    'Chicago Bulls', 'Cleveland Cavaliers', 'Detroit Pistons', 'Indiana Pacers', 'Milwaukee Bucks',
+    'Atlanta Hawks', 'Charlotte Hornets', 'Miami Heat', 'Orlando Magic', 'Washington Wizards',
+    'Denver Nuggets', 'Minnesota Timberwolves', 'Oklahoma City Thunder', 'Portland Trail Blazers', 'Utah Jazz',
+    'Golden State Warriors', 'LA Clippers', 'Los Angeles Lakers', 'Phoenix Suns', 'Sacramento Kings',
+    'Dallas Mavericks', 'Houston Rockets', 'Memphis Grizzlies', 'New Orleans Pelicans', 'San Antonio Spurs'
+]
+
+MARKETS = ['h2h', 'spreads', 'totals']
+OUTCOMES = ['home', 'away', 'over', 'under']
+
+
+class Interner:
+    """Map names to dense integer codes, shared across every frame.
+
+    Lookups of known names take no lock; adding a name does, so parser
+    threads can intern concurrently.
+    """
+
+    def __init__(self, names=(), dtype=np.int16):
+        self.dtype = dtype
+        self.names = []
+        self._codes = {}
+        self._lock = threading.Lock()
+        for name in names:
+            self.code(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def code(self, name):
+        """Code for ``name``, interning it if new"""
+        code = self._codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(name)
+                if code is None:
+                    code = self._codes[name] = len(self.names)
+                    self.names.append(name)
+        return code
+
+    def codes(self, values):
+        """Codes for an array-like of names; missing values become -1"""
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            values = values.array if isinstance(values, pd.Series) else values
+            local, uniques = values.codes, values.categories
+        else:
+            local, uniques = pd.factorize(np.asarray(values, dtype=object))
+
+        mapping = np.fromiter((self.code(name) for name in uniques), dtype=self.dtype, count=len(uniques))
+        codes = mapping[local] if len(mapping) else np.full(len(local), -1, dtype=self.dtype)
+        codes[np.asarray(local) < 0] = -1
+        return codes
+
+    @property
+    def dtype_categories(self):
+        """CategoricalDtype over every name interned so far"""
+        return pd.CategoricalDtype(list(self.names))
+
+    def from_codes(self, codes):
+        """Categorical of names for registry codes"""
+        return pd.Categorical.from_codes(codes, dtype=self.dtype_categories)
+
+    def categorical(self, values):
+        """Re-encode ``values`` as a categorical over the shared name list"""
+        codes = self.codes(values)
+        result = self.from_codes(codes)
+        if isinstance(values, pd.Series):
+            return pd.Series(result, index=values.index, name=values.name)
+        return result
+
+
+teams = Interner(NBA_TEAMS)
+books = Interner()
+markets = Interner(MARKETS, dtype=np.int8)
+outcomes = Interner(OUTCOMES, dtype=np.int8)
+sports = Interner()
@@ -0,0 +1,35 @@
+"""Single place that loads config.py and fills in optional settings.
+
+config.py lives one directory above the package; every module imports
+``config`` from here instead of patching sys.path itself.
+"""
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+import config
+
+# Settings newer than most config.py files; config values win
+DEFAULTS = {
+    'ODDS_API_BASE_URL': "https://api.the-odds-api.com/v4",
+    'ODDS_ARCHIVE_PATH': 'data/odds_archive',
+    'BETS_DB_PATH': 'data/bets.db',
+    'BANKROLL': 10000,
+    'UNIT_SIZE': 100,
+    'METRICS_ENABLED': False,
+    'MODEL_CACHE_MB': 512,
+    'DEFAULT_MODEL_SPORTS': ['basketball_nba'],  # sports the default models may serve
+    'PREDICTION_CACHE_SIZE': 100000,
+    'PREDICTION_CACHE_PATH': None,  # e.g. 'data/prediction_cache.npz' to persist
+}
+
+for _name, _value in DEFAULTS.items():
+    if not hasattr(config, _name):
+        setattr(config, _name, _value)
+
+if config.METRICS_ENABLED:
+    import metrics
+    metrics.enable()